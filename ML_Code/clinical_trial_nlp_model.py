@@ -5,7 +5,10 @@ Module for training the NLP models for intent classification and entity
 extraction.
 """
 
+import contextlib
 import json
+import os
+import sys
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
@@ -18,6 +21,7 @@ from transformers import (
     TrainingArguments,
     Trainer,
     DataCollatorForTokenClassification,
+    DataCollatorWithPadding,
     TrainerCallback
 )
 import pandas as pd
@@ -26,68 +30,195 @@ import seqeval
 import evaluate
 
 
+# Mixed precision: bf16 on GPUs that support it (Ampere+), fp16 on older
+# CUDA GPUs, full fp32 on CPU
+CUDA_AVAILABLE = torch.cuda.is_available()
+USE_BF16 = CUDA_AVAILABLE and torch.cuda.is_bf16_supported()
+USE_FP16 = CUDA_AVAILABLE and not USE_BF16
+AMP_DTYPE = torch.bfloat16 if USE_BF16 else torch.float16
+
+# TF32 matmuls for the remaining fp32 ops (needs compute capability 8.0+)
+USE_TF32 = CUDA_AVAILABLE and torch.cuda.get_device_capability()[0] >= 8
+if USE_TF32:
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
+
+# Kernel fusion through torch.compile (TorchInductor) when training on a GPU;
+# Inductor's Triton backend isn't available on Windows
+USE_TORCH_COMPILE = CUDA_AVAILABLE and sys.platform != "win32"
+
+# torchrun sets RANK for every process; console output comes from rank 0 only
+IS_MAIN_PROCESS = int(os.environ.get("RANK", "0")) == 0
+
+# Background DataLoader workers with pinned memory keep the GPU fed; on CPU
+# the main process loads the (pre-tokenized) batches itself
+DATALOADER_WORKERS = min(8, (os.cpu_count() or 2) // 2) if CUDA_AVAILABLE else 0
+
+# Single fused AdamW kernel over all parameters (the fused path is CUDA-only)
+OPTIMIZER = "adamw_torch_fused" if CUDA_AVAILABLE else "adamw_torch"
+
+# Let the Rust tokenizer use all cores for the batched dataset tokenization.
+# Only without DataLoader workers: their forked collators call tokenizer.pad,
+# and forcing parallelism on bypasses the tokenizers fork-safety guard
+if DATALOADER_WORKERS == 0:
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+
+def inference_autocast(model):
+    """Autocast context for prediction: half precision on CUDA, no-op on CPU"""
+    if model.device.type == 'cuda':
+        return torch.autocast(device_type='cuda', dtype=AMP_DTYPE)
+    return contextlib.nullcontext()
+
+
+def build_training_args(output_dir, epochs, batch_size, learning_rate,
+                        **overrides):
+    """TrainingArguments shared by every trainer in this module
+
+    Args:
+        output_dir: Directory for logs and the saved model
+        epochs: Number of epochs
+        batch_size: Per-device batch size for training and evaluation
+        learning_rate: Learning rate
+        **overrides: Trainer-specific TrainingArguments fields
+
+    Returns: TrainingArguments with the precision, compile, DDP and
+        DataLoader settings chosen for this machine
+    """
+    args = dict(
+        output_dir=output_dir,
+        num_train_epochs=epochs,
+        per_device_train_batch_size=batch_size,
+        per_device_eval_batch_size=batch_size,
+        learning_rate=learning_rate,
+        eval_strategy="epoch",
+        save_strategy="no",
+        save_safetensors=True,
+        save_only_model=True,
+        load_best_model_at_end=False,
+        warmup_steps=100,
+        weight_decay=0.01,
+        optim=OPTIMIZER,
+        logging_dir=f'{output_dir}/logs',
+        logging_steps=10,
+        group_by_length=True,
+        bf16=USE_BF16,
+        fp16=USE_FP16,
+        tf32=USE_TF32,
+        torch_compile=USE_TORCH_COMPILE,
+        torch_compile_backend="inductor" if USE_TORCH_COMPILE else None,
+        ddp_find_unused_parameters=False,
+        ddp_bucket_cap_mb=25,
+        dataloader_num_workers=DATALOADER_WORKERS,
+        dataloader_pin_memory=CUDA_AVAILABLE,
+        dataloader_persistent_workers=DATALOADER_WORKERS > 0,
+        dataloader_prefetch_factor=4 if DATALOADER_WORKERS else None
+    )
+    args.update(overrides)
+    return TrainingArguments(**args)
+
+
 class PrinterCallback(TrainerCallback):
     """Callback to print training progress"""
 
     def on_epoch_begin(self, args, state, control, **kwargs):
         """Called at the beginning of each epoch"""
-        print(f"\n{'='*60}")
-        print(f"Starting Epoch {state.epoch + 1}/{state.num_train_epochs}")
-        print(f"{'='*60}")
+        if not state.is_world_process_zero:
+            return
+        print(f"\n{'='*60}\n"
+              f"Starting Epoch {state.epoch + 1}/{state.num_train_epochs}\n"
+              f"{'='*60}")
 
     def on_log(self, args, state, control, logs=None, **kwargs):
         """Called when logging occurs"""
-        if logs:
-            # Print training loss
-            if 'loss' in logs:
-                print(f"  Step {state.global_step} - Training Loss: {logs['loss']:.4f}")
+        if not logs or not state.is_world_process_zero:
+            return
+
+        lines = []
+        # Training loss
+        if 'loss' in logs:
+            lines.append(f"  Step {state.global_step} - Training Loss: {logs['loss']:.4f}")
 
-            # Print learning rate
-            if 'learning_rate' in logs:
-                print(f"  Learning Rate: {logs['learning_rate']:.2e}")
+        # Learning rate
+        if 'learning_rate' in logs:
+            lines.append(f"  Learning Rate: {logs['learning_rate']:.2e}")
+
+        if lines:
+            print("\n".join(lines))
 
     def on_evaluate(self, args, state, control, metrics=None, **kwargs):
         """Called after evaluation"""
-        if metrics:
-            print(f"\n{'─'*60}")
-            print(f"Evaluation Results (Epoch {state.epoch}):")
-            print(f"{'─'*60}")
-            for key, value in metrics.items():
-                if isinstance(value, (int, float)):
-                    print(f"  {key}: {value:.4f}")
-            print(f"{'─'*60}\n")
+        if not metrics or not state.is_world_process_zero:
+            return
+
+        lines = [f"\n{'─'*60}",
+                 f"Evaluation Results (Epoch {state.epoch}):",
+                 f"{'─'*60}"]
+        for key, value in metrics.items():
+            if isinstance(value, (int, float)):
+                lines.append(f"  {key}: {value:.4f}")
+        lines.append(f"{'─'*60}\n")
+        print("\n".join(lines))
+
+
+class DistillationTrainer(Trainer):
+    """Trainer whose loss blends the hard labels with a teacher's soft targets"""
+
+    def __init__(self, *args, alpha=0.5, temperature=2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.alpha = alpha
+        self.temperature = temperature
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        """alpha * CE(labels) + (1 - alpha) * T^2 * KL(teacher || student)"""
+        teacher_logits = inputs.pop('teacher_logits', None)
+        if model.training and teacher_logits is None:
+            raise ValueError("Training batch has no teacher_logits; the "
+                             "student would train on labels alone")
+        outputs = model(**inputs)
+        loss = outputs.loss
+
+        # Validation batches carry no teacher logits and use plain CE
+        if teacher_logits is not None:
+            t = self.temperature
+            soft_loss = torch.nn.functional.kl_div(
+                torch.nn.functional.log_softmax(outputs.logits / t, dim=-1),
+                torch.nn.functional.softmax(teacher_logits / t, dim=-1),
+                reduction='batchmean'
+            ) * t ** 2
+            loss = self.alpha * loss + (1 - self.alpha) * soft_loss
+
+        return (loss, outputs) if return_outputs else loss
 
 
 class IntentDataset(Dataset):
     """Dataset for intent classification"""
 
-    def __init__(self, texts, labels, tokenizer, max_length=128):
-        self.texts = texts
+    def __init__(self, texts, labels, tokenizer, max_length=128,
+                 teacher_logits=None):
         self.labels = labels
-        self.tokenizer = tokenizer
-        self.max_length = max_length
+        self.teacher_logits = teacher_logits
+        # Tokenize every text in one batched call; padding is left to the
+        # data collator so each batch is only as wide as its longest text
+        self.encodings = tokenizer(
+            [str(text) for text in texts],
+            add_special_tokens=True,
+            max_length=max_length,
+            truncation=True
+        )
 
     def __len__(self):
-        return len(self.texts)
+        return len(self.labels)
 
     def __getitem__(self, idx):
-        text = str(self.texts[idx])
-        label = self.labels[idx]
-
-        encoding = self.tokenizer(
-            text,
-            add_special_tokens=True,
-            max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
-        )
-
-        return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'labels': torch.tensor(label, dtype=torch.long)
+        item = {
+            'input_ids': self.encodings['input_ids'][idx],
+            'attention_mask': self.encodings['attention_mask'][idx],
+            'labels': self.labels[idx]
         }
+        if self.teacher_logits is not None:
+            item['teacher_logits'] = self.teacher_logits[idx]
+        return item
 
 
 class IntentClassifier:
@@ -103,7 +234,10 @@ class IntentClassifier:
         """
         self.model_name = model_name
         self.num_labels = num_labels
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name,
+                                                       use_fast=True)
+        if not self.tokenizer.is_fast:
+            raise ValueError(f"No fast tokenizer available for {model_name}")
         self.model = None
         self.label_map = {}
         self.reverse_label_map = {}
@@ -120,24 +254,25 @@ class IntentClassifier:
         texts = [item['text'] for item in training_data]
         intents = [item['intent'] for item in training_data]
 
-        # Create label mapping
-        unique_intents = sorted(list(set(intents)))
+        # Create label mapping and encode labels in one pass; np.unique
+        # returns the sorted intents and each example's index into them
+        unique_intents, encoded_labels = np.unique(intents,
+                                                   return_inverse=True)
         self.label_map = {intent: idx for idx, intent in
-                          enumerate(unique_intents)}
+                          enumerate(unique_intents.tolist())}
         self.reverse_label_map = {idx: intent for intent, idx in
                                   self.label_map.items()}
 
-        # Encode labels
-        encoded_labels = [self.label_map[intent] for intent in intents]
-
-        return texts, encoded_labels
+        return texts, encoded_labels.tolist()
 
     def train(self, training_data: List[Dict],
               validation_split=0.2,
               epochs=20,
               batch_size=16,
               learning_rate=2e-5,
-              output_dir='./intent_model'):
+              output_dir='./intent_model',
+              gradient_accumulation_steps=1,
+              gradient_checkpointing=False):
         """Train the intent classification model.
 
         Args:
@@ -147,6 +282,11 @@ class IntentClassifier:
             batch_size: Batch size for training
             learning_rate: Learning rate
             output_dir: Directory to save the model
+            gradient_accumulation_steps: Batches accumulated per optimizer
+                step; effective batch = batch_size x steps x number of GPUs
+            gradient_checkpointing: Recompute activations in the backward
+                pass instead of storing them, for larger batches or
+                max_length at roughly 30% more compute per step
         """
         # Prepare data
         texts, labels = self.prepare_data(training_data)
@@ -156,17 +296,22 @@ class IntentClassifier:
             texts, labels, test_size=validation_split, random_state=42,
             stratify=labels)
 
-        print(f"\n{'='*60}")
-        print(f"Training Configuration:")
-        print(f"{'='*60}")
-        print(f"Training samples: {len(train_texts)}")
-        print(f"Validation samples: {len(val_texts)}")
-        print(f"Intent classes: {list(self.label_map.keys())}")
-        print(f"Number of classes: {len(self.label_map)}")
-        print(f"Epochs: {epochs}")
-        print(f"Batch size: {batch_size}")
-        print(f"Learning rate: {learning_rate}")
-        print(f"{'='*60}\n")
+        if IS_MAIN_PROCESS:
+            print(f"\n{'='*60}")
+            print(f"Training Configuration:")
+            print(f"{'='*60}")
+            print(f"Training samples: {len(train_texts)}")
+            print(f"Validation samples: {len(val_texts)}")
+            print(f"Intent classes: {list(self.label_map.keys())}")
+            print(f"Number of classes: {len(self.label_map)}")
+            print(f"Epochs: {epochs}")
+            print(f"Batch size: {batch_size}")
+            print(f"Gradient accumulation steps: {gradient_accumulation_steps}")
+            print(f"Learning rate: {learning_rate}")
+            print(f"{'='*60}\n")
+            if batch_size % 8:
+                print(f"Warning: batch size {batch_size} is not a multiple of 8; "
+                      "half-precision GEMMs run fastest on multiples of 8")
 
         # Create datasets
         train_dataset = IntentDataset(train_texts, train_labels,
@@ -176,25 +321,17 @@ class IntentClassifier:
         # Initialize model
         self.model = AutoModelForSequenceClassification.from_pretrained(
             self.model_name,
-            num_labels=len(self.label_map)
+            num_labels=len(self.label_map),
+            attn_implementation="sdpa"
         )
 
         # Training arguments
-        training_args = TrainingArguments(
-            output_dir=output_dir,
-            num_train_epochs=epochs,
-            per_device_train_batch_size=batch_size,
-            per_device_eval_batch_size=batch_size,
-            learning_rate=learning_rate,
-            eval_strategy="epoch",
-            save_strategy="no",
-            save_total_limit=1,
-            load_best_model_at_end=False,
-            metric_for_best_model="eval_loss",
-            warmup_steps=100,
-            weight_decay=0.01,
-            logging_dir=f'{output_dir}/logs',
-            logging_steps=10
+        training_args = build_training_args(
+            output_dir, epochs, batch_size, learning_rate,
+            gradient_accumulation_steps=gradient_accumulation_steps,
+            gradient_checkpointing=gradient_checkpointing,
+            gradient_checkpointing_kwargs={"use_reentrant": False},
+            metric_for_best_model="eval_loss"
         )
 
         # Trainer with callback
@@ -203,16 +340,26 @@ class IntentClassifier:
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=val_dataset,
+            data_collator=DataCollatorWithPadding(self.tokenizer),
             compute_metrics=compute_intent_metrics,
             callbacks=[PrinterCallback()])
 
         # Train
-        print("\nStarting intent classification training...\n")
+        if IS_MAIN_PROCESS:
+            print("\nStarting intent classification training...\n")
         trainer.train()
 
         # Evaluate
-        print("\nFinal Evaluation...")
+        if IS_MAIN_PROCESS:
+            print("\nFinal Evaluation...")
         results = trainer.evaluate()
+        # Leave the trained model in eval mode for predict()
+        self.model.eval()
+
+        # Under torchrun only the main process reports and writes the model
+        if not trainer.is_world_process_zero():
+            return results
+
         print(f"\n{'='*60}")
         print(f"Final Results:")
         print(f"{'='*60}")
@@ -223,7 +370,7 @@ class IntentClassifier:
         print(f"{'='*60}\n")
 
         # Save model and tokenizer
-        self.model.save_pretrained(output_dir)
+        self.model.save_pretrained(output_dir, safe_serialization=True)
         self.tokenizer.save_pretrained(output_dir)
 
         # Save label mapping
@@ -246,21 +393,22 @@ class IntentClassifier:
         if self.model is None:
             raise ValueError("Model not trained yet. Call train() first")
 
-        # encode the tokens list for
+        # A single text needs no padding, so attention runs over its actual
+        # length instead of all 128 positions
         encoding = self.tokenizer(
             text,
             add_special_tokens=True,
             max_length=128,
-            padding='max_length',
             truncation=True,
             return_tensors='pt'
         )
 
+        encoding = encoding.to(self.model.device)
+
         # Predicts
-        self.model.eval()
-        with torch.no_grad():
+        with torch.inference_mode(), inference_autocast(self.model):
             outputs = self.model(**encoding)
-            logits = outputs.logits
+            logits = outputs.logits.float()
             probabilities = torch.nn.functional.softmax(logits, dim=1)
             predicted_class = torch.argmax(probabilities, dim=1).item()
             confidence = probabilities[0][predicted_class].item()
@@ -269,58 +417,190 @@ class IntentClassifier:
 
         return predicted_intent, confidence
 
+    def to_onnx(self, model_dir='./intent_model',
+                output_dir='./intent_model_onnx'):
+        """Export the saved model to ONNX and run predict() on ONNX Runtime
+
+        Args:
+            model_dir: Directory the trained model was saved to
+            output_dir: Directory to write the optimized ONNX model to
+        """
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        self.model = export_to_onnx(ORTModelForSequenceClassification,
+                                    model_dir, output_dir)
+        self.tokenizer.save_pretrained(output_dir)
+
+    def distill(self, training_data: List[Dict],
+                num_student_layers=4,
+                alpha=0.5,
+                temperature=2.0,
+                validation_split=0.2,
+                epochs=20,
+                batch_size=16,
+                learning_rate=5e-5,
+                output_dir='./intent_model_student'):
+        """Distill the trained model into a smaller student for predict().
+
+        The student keeps the first `num_student_layers` encoder layers of
+        the base model, so it shares the tokenizer, and learns from both the
+        labels and the trained model's temperature-softened logits. It
+        replaces self.model once training finishes.
+
+        Args:
+            training_data: List of training examples
+            num_student_layers: Encoder layers kept in the student
+            alpha: Weight of the hard-label loss (1 - alpha for the teacher)
+            temperature: Softmax temperature for the teacher's targets
+            validation_split: Fraction of data to use for validation
+            epochs: Number of epochs
+            batch_size: Batch size for training
+            learning_rate: Learning rate
+            output_dir: Directory to save the student model
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet. Call train() first")
+
+        # Encode with the teacher's label map so label ids line up with the
+        # teacher's logits
+        texts = [item['text'] for item in training_data]
+        unknown = ({item['intent'] for item in training_data}
+                   - self.label_map.keys())
+        if unknown:
+            raise ValueError(
+                f"Intents unknown to the trained model: {sorted(unknown)}")
+        labels = [self.label_map[item['intent']] for item in training_data]
+
+        train_texts, val_texts, train_labels, val_labels = train_test_split(
+            texts, labels, test_size=validation_split, random_state=42,
+            stratify=labels)
+
+        # Teacher soft targets are computed once, not on every student step
+        teacher_logits = self._logits(train_texts, batch_size)
+        train_dataset = IntentDataset(train_texts, train_labels,
+                                      self.tokenizer,
+                                      teacher_logits=teacher_logits)
+        val_dataset = IntentDataset(val_texts, val_labels, self.tokenizer)
+
+        student = AutoModelForSequenceClassification.from_pretrained(
+            self.model_name,
+            num_labels=len(self.label_map),
+            num_hidden_layers=num_student_layers,
+            attn_implementation="sdpa"
+        )
+
+        # teacher_logits isn't a forward() argument, so Trainer's column
+        # removal would otherwise drop it before compute_loss sees it
+        training_args = build_training_args(
+            output_dir, epochs, batch_size, learning_rate,
+            metric_for_best_model="eval_loss",
+            remove_unused_columns=False
+        )
+
+        trainer = DistillationTrainer(
+            model=student,
+            args=training_args,
+            train_dataset=train_dataset,
+            eval_dataset=val_dataset,
+            data_collator=DataCollatorWithPadding(self.tokenizer),
+            compute_metrics=compute_intent_metrics,
+            callbacks=[PrinterCallback()],
+            alpha=alpha,
+            temperature=temperature)
+
+        if IS_MAIN_PROCESS:
+            print(f"\nDistilling into a {num_student_layers}-layer student...\n")
+        trainer.train()
+
+        if IS_MAIN_PROCESS:
+            print("\nFinal Evaluation...")
+        results = trainer.evaluate()
+        self.model = student.eval()
+
+        if not trainer.is_world_process_zero():
+            return results
+
+        print(f"\n{'='*60}")
+        print(f"Student Results:")
+        print(f"{'='*60}")
+        for key, value in results.items():
+            if isinstance(value, (int, float)):
+                print(f"{key}: {value:.4f}")
+        print(f"{'='*60}\n")
+
+        self.model.save_pretrained(output_dir, safe_serialization=True)
+        self.tokenizer.save_pretrained(output_dir)
+        with open(f'{output_dir}/label_map.json', 'w') as f:
+            json.dump(self.label_map, f, indent=2)
+
+        print(f"\n Student model saved to {output_dir}")
+
+        return results
+
+    def _logits(self, texts, batch_size):
+        """Current model's fp32 logits for each text, as lists of floats"""
+        logits = []
+        for start in range(0, len(texts), batch_size):
+            encoding = self.tokenizer(
+                texts[start:start + batch_size],
+                max_length=128,
+                padding=True,
+                truncation=True,
+                return_tensors='pt'
+            ).to(self.model.device)
+            with torch.inference_mode(), inference_autocast(self.model):
+                logits.append(self.model(**encoding).logits.float().cpu())
+        return torch.cat(logits).tolist()
+
 
 class NERDataset(Dataset):
     """Dataset for NER training"""
 
     def __init__(self, texts, tags, tokenizer, label_map, max_length=128):
-        self.texts = texts
-        self.tags = tags
-        self.tokenizer = tokenizer
         self.label_map = label_map
-        self.max_length = max_length
-
-    def __len__(self):
-        return len(self.texts)
-
-    def __getitem__(self, idx):
-        words = self.texts[idx]
-        tags = self.tags[idx]
-
-        # Tokenize
-        encoding = self.tokenizer(
-            words,
+        # Tokenize every example in one batched call; padding is left to
+        # DataCollatorForTokenClassification
+        self.encodings = tokenizer(
+            texts,
             is_split_into_words=True,
-            max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
+            max_length=max_length,
+            truncation=True
         )
+        self.labels = [
+            self.align_labels(self.encodings.word_ids(batch_index=i), tags[i])
+            for i in range(len(texts))
+        ]
+
+    def align_labels(self, word_ids, tags):
+        """Align word-level tags with tokens"""
+        # -1 marks special tokens; only the first token of each word is labelled
+        word_ids = np.array([-1 if w is None else w for w in word_ids],
+                            dtype=np.int64)
+        first_token = np.ones(len(word_ids), dtype=bool)
+        first_token[1:] = word_ids[1:] != word_ids[:-1]
+        keep = first_token & (word_ids >= 0)
+
+        # Look up tags only for words that survived truncation
+        tag_ids = []
+        for word_id in word_ids[keep].tolist():
+            tag = tags[word_id]
+            if tag not in self.label_map:
+                print(f"Warning: Unknown tag '{tag}' found, using 'O'")
+                tag = 'O'
+            tag_ids.append(self.label_map[tag])
+
+        label_ids = np.full(len(word_ids), -100, dtype=np.int64)
+        label_ids[keep] = tag_ids
+        return label_ids
 
-        # Align labels with tokens
-        word_ids = encoding.word_ids(batch_index=0)  # Get word_ids for first sequence
-        label_ids = []
-        previous_word_id = None
-
-        for word_id in word_ids:
-            if word_id is None:
-                label_ids.append(-100)  # special tokens
-            elif word_id != previous_word_id:  # Only label first token of each word
-                if tags[word_id] not in self.label_map:
-                    print(f"Warning: Unknown tag '{tags[word_id]}' found, using 'O'")
-                    label_ids.append(self.label_map['O'])
-                else:
-                    label_ids.append(self.label_map[tags[word_id]])
-            else:
-                label_ids.append(-100)  # Subsequent tokens of same word
-            previous_word_id = word_id
-
-        encoding['labels'] = torch.tensor(label_ids, dtype=torch.long)
+    def __len__(self):
+        return len(self.labels)
 
+    def __getitem__(self, idx):
         return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
-            'labels': encoding['labels'].flatten()
+            'input_ids': self.encodings['input_ids'][idx],
+            'attention_mask': self.encodings['attention_mask'][idx],
+            'labels': self.labels[idx]
         }
 
 
@@ -343,7 +623,10 @@ class ClinicalNER:
             model_name: Pretrained model to use
         """
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name,
+                                                       use_fast=True)
+        if not self.tokenizer.is_fast:
+            raise ValueError(f"No fast tokenizer available for {model_name}")
         self.model = None
         self.label_map = {label: idx for idx, label in
                           enumerate(self.ENTITY_TYPES)}
@@ -369,7 +652,9 @@ class ClinicalNER:
               epochs=20,
               batch_size=16,
               learning_rate=3e-5,
-              output_dir='./ner_model'):
+              output_dir='./ner_model',
+              gradient_accumulation_steps=1,
+              gradient_checkpointing=False):
         """Train the NER model
 
         Args:
@@ -379,6 +664,11 @@ class ClinicalNER:
             batch_size: Batch size
             learning_rate: Learning rate
             output_dir: Directory to save model
+            gradient_accumulation_steps: Batches accumulated per optimizer
+                step; effective batch = batch_size x steps x number of GPUs
+            gradient_checkpointing: Recompute activations in the backward
+                pass instead of storing them, for larger batches or
+                max_length at roughly 30% more compute per step
         """
         # Prepare data
         texts, tags = self.prepare_data(training_data)
@@ -388,17 +678,22 @@ class ClinicalNER:
             texts, tags, test_size=validation_split, random_state=42
         )
 
-        print(f"\n{'='*60}")
-        print(f"Training Configuration:")
-        print(f"{'='*60}")
-        print(f"Training samples: {len(train_texts)}")
-        print(f"Validation samples: {len(val_texts)}")
-        print(f"Entity types: {self.ENTITY_TYPES}")
-        print(f"Number of entity types: {len(self.ENTITY_TYPES)}")
-        print(f"Epochs: {epochs}")
-        print(f"Batch size: {batch_size}")
-        print(f"Learning rate: {learning_rate}")
-        print(f"{'='*60}\n")
+        if IS_MAIN_PROCESS:
+            print(f"\n{'='*60}")
+            print(f"Training Configuration:")
+            print(f"{'='*60}")
+            print(f"Training samples: {len(train_texts)}")
+            print(f"Validation samples: {len(val_texts)}")
+            print(f"Entity types: {self.ENTITY_TYPES}")
+            print(f"Number of entity types: {len(self.ENTITY_TYPES)}")
+            print(f"Epochs: {epochs}")
+            print(f"Batch size: {batch_size}")
+            print(f"Gradient accumulation steps: {gradient_accumulation_steps}")
+            print(f"Learning rate: {learning_rate}")
+            print(f"{'='*60}\n")
+            if batch_size % 8:
+                print(f"Warning: batch size {batch_size} is not a multiple of 8; "
+                      "half-precision GEMMs run fastest on multiples of 8")
 
         # Create datasets
         train_dataset = NERDataset(train_texts, train_tags, self.tokenizer,
@@ -409,27 +704,20 @@ class ClinicalNER:
         # Initialize model
         self.model = AutoModelForTokenClassification.from_pretrained(
             self.model_name,
-            num_labels=len(self.label_map)
+            num_labels=len(self.label_map),
+            attn_implementation="sdpa"
         )
 
         # Data collator
         data_collator = DataCollatorForTokenClassification(self.tokenizer)
 
         # Training arguments
-        training_args = TrainingArguments(
-            output_dir=output_dir,
-            num_train_epochs=epochs,
-            per_device_train_batch_size=batch_size,
-            per_device_eval_batch_size=batch_size,
-            learning_rate=learning_rate,
-            eval_strategy="epoch",
-            save_strategy="no",
-            load_best_model_at_end=False,
-            metric_for_best_model="eval_f1",
-            warmup_steps=100,
-            weight_decay=0.01,
-            logging_dir=f'{output_dir}/logs',
-            logging_steps=10
+        training_args = build_training_args(
+            output_dir, epochs, batch_size, learning_rate,
+            gradient_accumulation_steps=gradient_accumulation_steps,
+            gradient_checkpointing=gradient_checkpointing,
+            gradient_checkpointing_kwargs={"use_reentrant": False},
+            metric_for_best_model="eval_f1"
         )
 
         label_list = self.ENTITY_TYPES
@@ -446,12 +734,21 @@ class ClinicalNER:
         )
 
         # Train
-        print("\nStarting NER training...\n")
+        if IS_MAIN_PROCESS:
+            print("\nStarting NER training...\n")
         trainer.train()
 
         # Evaluate
-        print("\nFinal Evaluation...")
+        if IS_MAIN_PROCESS:
+            print("\nFinal Evaluation...")
         results = trainer.evaluate()
+        # Leave the trained model in eval mode for predict()
+        self.model.eval()
+
+        # Under torchrun only the main process reports and writes the model
+        if not trainer.is_world_process_zero():
+            return results
+
         print(f"\n{'='*60}")
         print(f"Final Results:")
         print(f"{'='*60}")
@@ -462,7 +759,7 @@ class ClinicalNER:
         print(f"{'='*60}\n")
 
         # Save
-        self.model.save_pretrained(output_dir)
+        self.model.save_pretrained(output_dir, safe_serialization=True)
         self.tokenizer.save_pretrained(output_dir)
 
         with open(f'{output_dir}/label_map.json', 'w') as f:
@@ -480,45 +777,69 @@ class ClinicalNER:
 
         Returns: List of extracted entities with their types and positions
         """
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str],
+                      batch_size: int = 32) -> List[List[Dict]]:
+        """Extract entities from several texts with batched forward passes
+
+        Texts are sorted by length so each batch is padded only to its own
+        longest text; results are returned in the original order.
+
+        Args:
+            texts: Input texts
+            batch_size: Number of texts per forward pass
+
+        Returns: One list of extracted entities per input text
+        """
 
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
 
-        tokens = text.split()
+        tokens_list = [text.split() for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: len(tokens_list[i]))
+        results = [None] * len(texts)
 
-        encoding = self.tokenizer(
-            tokens,
-            is_split_into_words=True,
-            return_tensors='pt',
-            padding=True,
-            truncation=True
-        )
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
 
-        # Predict
-        self.model.eval()
-        with torch.no_grad():
-            outputs = self.model(**encoding)
-            predictions = torch.argmax(outputs.logits, dim=2)
+            encoding = self.tokenizer(
+                [tokens_list[i] for i in batch],
+                is_split_into_words=True,
+                return_tensors='pt',
+                padding=True,
+                truncation=True
+            )
+            encoding = encoding.to(self.model.device)
 
-        # Extract entities
-        word_ids = encoding.word_ids(batch_index=0)
-        entities = []
-        current_entity = None
-        previous_word_id = None
+            # Predict
+            with torch.inference_mode(), inference_autocast(self.model):
+                outputs = self.model(**encoding)
+                predictions = torch.argmax(outputs.logits, dim=2).cpu().numpy()
+
+            for row, i in enumerate(batch):
+                results[i] = self._decode_entities(
+                    tokens_list[i], encoding.word_ids(batch_index=row),
+                    predictions[row])
 
-        for idx, word_id in enumerate(word_ids):
-            if word_id is None:
-                continue
+        return results
 
-            # Skip if this is a continuation of a subword token
-            if word_id == previous_word_id:
-                continue
+    def _decode_entities(self, tokens, word_ids, predictions):
+        """Turn one example's token predictions into B-/I- entity spans"""
+        # Keep the first token of each word (-1 marks special/pad tokens)
+        word_ids = np.array([-1 if w is None else w for w in word_ids],
+                            dtype=np.int64)
+        first_token = np.ones(len(word_ids), dtype=bool)
+        first_token[1:] = word_ids[1:] != word_ids[:-1]
+        positions = np.flatnonzero(first_token & (word_ids >= 0)
+                                   & (word_ids < len(tokens)))
 
-            if word_id >= len(tokens):  # Safety check
-                continue
+        entities = []
+        current_entity = None
 
-            pred_id = predictions[0][idx]
-            label = self.reverse_label_map[pred_id.item()]
+        for word_id, pred_id in zip(word_ids[positions].tolist(),
+                                    predictions[positions].tolist()):
+            label = self.reverse_label_map[pred_id]
 
             if label.startswith('B-'):
                 # Start new entity
@@ -541,13 +862,24 @@ class ClinicalNER:
                     entities.append(current_entity)
                     current_entity = None
 
-            previous_word_id = word_id
-
         if current_entity:
             entities.append(current_entity)
 
         return entities
 
+    def to_onnx(self, model_dir='./ner_model', output_dir='./ner_model_onnx'):
+        """Export the saved model to ONNX and run predict() on ONNX Runtime
+
+        Args:
+            model_dir: Directory the trained model was saved to
+            output_dir: Directory to write the optimized ONNX model to
+        """
+        from optimum.onnxruntime import ORTModelForTokenClassification
+
+        self.model = export_to_onnx(ORTModelForTokenClassification,
+                                    model_dir, output_dir)
+        self.tokenizer.save_pretrained(output_dir)
+
 
 # HELPER FUNCTIONS
 
@@ -638,10 +970,49 @@ def compute_ner_metrics(p, label_list):
         "eval_accuracy": results["overall_accuracy"],
     }
 
+def export_to_onnx(ort_model_class, model_dir, output_dir):
+    """Export a saved model to ONNX with fused attention/GELU/LayerNorm
+
+    Needs the optional `optimum[onnxruntime]` package (`onnxruntime-gpu` for
+    CUDA inference).
+
+    Args:
+        ort_model_class: optimum ORTModel class matching the model's task
+        model_dir: Directory with the saved PyTorch model
+        output_dir: Directory to write the optimized ONNX model to
+
+    Returns: ONNX Runtime model usable in place of the PyTorch model
+    """
+    from optimum.onnxruntime import ORTOptimizer
+    from optimum.onnxruntime.configuration import OptimizationConfig
+
+    provider = ("CUDAExecutionProvider" if CUDA_AVAILABLE
+                else "CPUExecutionProvider")
+
+    ort_model = ort_model_class.from_pretrained(model_dir, export=True,
+                                                provider=provider)
+    optimizer = ORTOptimizer.from_pretrained(ort_model)
+    optimizer.optimize(save_dir=output_dir,
+                       optimization_config=OptimizationConfig(
+                           optimization_level=2))
+
+    return ort_model_class.from_pretrained(output_dir,
+                                           file_name="model_optimized.onnx",
+                                           provider=provider)
+
+
 def main():
-    """Main function for training models"""
-    print("Clinical Trial NLP Model Training")
-    print("=" * 50)
+    """Main function for training models
+
+    Runs on a single device with `python clinical_trial_nlp_model.py`. For
+    multi-GPU DistributedDataParallel training, launch it with
+    `torchrun --standalone --nproc_per_node=gpu clinical_trial_nlp_model.py`;
+    Trainer picks up the torchrun environment and gives each process its
+    shard of the (identical, random_state=42) train split.
+    """
+    if IS_MAIN_PROCESS:
+        print("Clinical Trial NLP Model Training")
+        print("=" * 50)
 
 
     # Train Intent Classifier
@@ -654,7 +1025,8 @@ def main():
     ner_model = ClinicalNER()
     ner_model.train(ner_data)
 
-    print("\nTraining complete.")
+    if IS_MAIN_PROCESS:
+        print("\nTraining complete.")
 
 
 if __name__ == "__main__":
@@ -9,7 +9,8 @@ async def search_clinical_trials(
         cancer_type: str,
         location: str,
         stage: Optional[str] = None,
-        age: Optional[int] = None
+        age: Optional[int] = None,
+        client: Optional[httpx.AsyncClient] = None
     ) -> List[Dict[str, Any]]:
     """
     Query the REAL ClinicalTrials.gov API v2 for recruiting trials.
@@ -19,6 +20,7 @@ async def search_clinical_trials(
         location: City and state (e.g., "Boston Massachusetts")
         stage: Cancer stage (optional)
         age: Patient age (optional)
+        client: Shared AsyncClient to reuse (optional, one is created if omitted)
     
     Returns:
         List of clinical trial dictionaries with real trial data
@@ -38,43 +40,10 @@ async def search_clinical_trials(
     }
 
     try:
+        if client is not None:
+            return await _fetch_trials(client, base_url, params, cancer_type, location)
         async with httpx.AsyncClient(timeout=10.0) as client:
-            logger.info(f"Calling ClinicalTrials.gov API for {cancer_type} in {location}")
-            
-            # Make the REAL API call with location filter
-            response = await client.get(f"{base_url}/studies", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            studies = data.get("studies", [])
-            
-            # Parse and format the results
-            trials = parse_trials(studies, location)
-            
-            logger.info(f"Found {len(trials)} trials for {cancer_type} in {location}")
-            
-            # If no trials found locally, search nationwide
-            if not trials or len(trials) == 0:
-                logger.info(f"No local trials found, searching nationwide for {cancer_type}")
-                
-                # Remove location filter for broader search
-                params_nationwide = {
-                    "query.cond": cancer_type,
-                    "filter.overallStatus": "RECRUITING",
-                    "pageSize": 10,
-                    "format": "json"
-                }
-                
-                response_nationwide = await client.get(f"{base_url}/studies", params=params_nationwide)
-                response_nationwide.raise_for_status()
-                
-                data_nationwide = response_nationwide.json()
-                studies_nationwide = data_nationwide.get("studies", [])
-                
-                trials = parse_trials(studies_nationwide, location, is_nationwide=True)
-                logger.info(f"Found {len(trials)} trials nationwide for {cancer_type}")
-            
-            return trials
+            return await _fetch_trials(client, base_url, params, cancer_type, location)
             
     except httpx.TimeoutException:
         logger.error(f"Timeout calling ClinicalTrials.gov API")
@@ -89,6 +58,52 @@ async def search_clinical_trials(
         return get_error_response(cancer_type, location, "Unexpected error")
 
 
+async def _fetch_trials(
+        client: httpx.AsyncClient,
+        base_url: str,
+        params: Dict[str, Any],
+        cancer_type: str,
+        location: str
+    ) -> List[Dict[str, Any]]:
+    """Run the local search, falling back to a nationwide search if it comes back empty."""
+    logger.info(f"Calling ClinicalTrials.gov API for {cancer_type} in {location}")
+    
+    # Make the REAL API call with location filter
+    response = await client.get(f"{base_url}/studies", params=params)
+    response.raise_for_status()
+    
+    data = response.json()
+    studies = data.get("studies", [])
+    
+    # Parse and format the results
+    trials = parse_trials(studies, location)
+    
+    logger.info(f"Found {len(trials)} trials for {cancer_type} in {location}")
+    
+    # If no trials found locally, search nationwide
+    if not trials or len(trials) == 0:
+        logger.info(f"No local trials found, searching nationwide for {cancer_type}")
+        
+        # Remove location filter for broader search
+        params_nationwide = {
+            "query.cond": cancer_type,
+            "filter.overallStatus": "RECRUITING",
+            "pageSize": 10,
+            "format": "json"
+        }
+        
+        response_nationwide = await client.get(f"{base_url}/studies", params=params_nationwide)
+        response_nationwide.raise_for_status()
+        
+        data_nationwide = response_nationwide.json()
+        studies_nationwide = data_nationwide.get("studies", [])
+        
+        trials = parse_trials(studies_nationwide, location, is_nationwide=True)
+        logger.info(f"Found {len(trials)} trials nationwide for {cancer_type}")
+    
+    return trials
+
+
 def format_location_for_api(location: str) -> str:
     """
     Convert location format for the API.
@@ -8,7 +8,7 @@ Generates summary statistics and identifies any issues
 import csv
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter
 from typing import List, Dict
 
 CSV_FILE = Path(__file__).parent / "weekend_api_monitoring.csv"
@@ -52,14 +52,10 @@ Data File: {CSV_FILE.name}
     errors_found = [r for r in rows if r['Error_Message']]
     
     # Cancer type breakdown
-    cancer_types = defaultdict(int)
-    for row in rows:
-        cancer_types[row['Cancer_Type']] += 1
+    cancer_types = Counter(row['Cancer_Type'] for row in rows)
     
     # Location breakdown
-    locations = defaultdict(int)
-    for row in rows:
-        locations[row['Location']] += 1
+    locations = Counter(row['Location'] for row in rows)
     
     # Print Summary
     print("📊 OVERALL STATISTICS")
@@ -89,13 +85,13 @@ Data File: {CSV_FILE.name}
     
     print("🏥 CANCER TYPES TESTED")
     print(f"{'─'*70}")
-    for cancer_type, count in sorted(cancer_types.items(), key=lambda x: x[1], reverse=True):
+    for cancer_type, count in cancer_types.most_common():
         print(f"  {cancer_type:<25} {count:>3} tests")
     print()
     
     print("📍 LOCATIONS TESTED")
     print(f"{'─'*70}")
-    for location, count in sorted(locations.items(), key=lambda x: x[1], reverse=True)[:10]:
+    for location, count in locations.most_common(10):
         print(f"  {location:<30} {count:>3} tests")
     print()
     
@@ -103,12 +99,9 @@ Data File: {CSV_FILE.name}
     if errors_found:
         print("❌ ERRORS ENCOUNTERED")
         print(f"{'─'*70}")
-        error_types = defaultdict(int)
-        for row in errors_found:
-            error_msg = row['Error_Message'][:50]
-            error_types[error_msg] += 1
+        error_types = Counter(row['Error_Message'][:50] for row in errors_found)
         
-        for error, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True):
+        for error, count in error_types.most_common():
             print(f"  [{count}x] {error}")
         print()
     else:
@@ -0,0 +1,41 @@
+"""
+Pytest fixtures for the ClinicalTrials.gov API tests.
+
+The event loop and HTTP client are created once per pytest run and shared by
+every test in this folder, so the connection pool survives between tests.
+"""
+import asyncio
+import inspect
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from ct_client import create_client, install_uvloop
+
+API_TESTING_DIR = Path(__file__).parent
+
+install_uvloop()
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Single event loop for the whole test session"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """Pooled AsyncClient shared by all API tests"""
+    async with create_client() as c:
+        yield c
+
+
+def pytest_collection_modifyitems(items):
+    """Run the async test functions in this folder on the shared event loop"""
+    for item in items:
+        if item.path.parent == API_TESTING_DIR and inspect.iscoroutinefunction(
+                getattr(item, "obj", None)):
+            item.add_marker(pytest.mark.asyncio)
@@ -12,6 +12,7 @@ backend_path = Path(__file__).parent
 sys.path.insert(0, str(backend_path))
 
 from app.services.clinicaltrials_api import search_clinical_trials
+from ct_client import create_client, install_uvloop
 
 
 class Colors:
@@ -24,7 +25,7 @@ class Colors:
     ENDC = '\033[0m'
 
 
-async def test_fallback():
+async def test_fallback(client):
     """Test the nationwide fallback"""
     
     print("\n" + "="*70)
@@ -38,7 +39,8 @@ async def test_fallback():
     
     trials = await search_clinical_trials(
         cancer_type="lung cancer",
-        location="Siloam Springs Arkansas"
+        location="Siloam Springs Arkansas",
+        client=client
     )
     
     if trials:
@@ -68,7 +70,8 @@ async def test_fallback():
     
     trials = await search_clinical_trials(
         cancer_type="breast cancer",
-        location="Boston Massachusetts"
+        location="Boston Massachusetts",
+        client=client
     )
     
     if trials:
@@ -98,5 +101,12 @@ async def test_fallback():
     print()
 
 
+async def main():
+    """Run the test with a single shared client"""
+    async with create_client() as client:
+        await test_fallback(client)
+
+
 if __name__ == "__main__":
-    asyncio.run(test_fallback())
+    install_uvloop()
+    asyncio.run(main())
@@ -3,8 +3,9 @@ Test the full chatbot flow with real API integration.
 This simulates a complete user conversation.
 """
 
-import httpx
+import aiohttp
 import asyncio
+import orjson
 from colorama import init, Fore, Style
 
 init(autoreset=True)
@@ -18,7 +19,14 @@ async def test_full_chatbot_flow():
     print(f"{Fore.CYAN}Testing MaleCare ChatBot - Full Flow with Real API")
     print(f"{Fore.CYAN}{'='*70}\n")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        limit_per_host=30,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(total=30)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
         
         # Step 1: Start a session with /intake
         print(f"{Fore.YELLOW}Step 1: Starting session with /intake")
@@ -36,9 +44,9 @@ async def test_full_chatbot_flow():
             print(f"  {key}: {value}")
         
         try:
-            response = await client.post(f"{BASE_URL}/intake", json=intake_data)
-            response.raise_for_status()
-            intake_result = response.json()
+            async with session.post(f"{BASE_URL}/intake", json=intake_data) as response:
+                response.raise_for_status()
+                intake_result = orjson.loads(await response.read())
             
             session_id = intake_result.get("session_id")
             print(f"\n{Fore.GREEN}✓ Session created!")
@@ -83,9 +91,9 @@ async def test_full_chatbot_flow():
                     "message": "show me trials"
                 }
                 
-                response = await client.post(f"{BASE_URL}/message", json=message_data)
-                response.raise_for_status()
-                message_result = response.json()
+                async with session.post(f"{BASE_URL}/message", json=message_data) as response:
+                    response.raise_for_status()
+                    message_result = orjson.loads(await response.read())
                 
                 print(f"\n{Fore.GREEN}Response: {message_result.get('response')}")
                 
@@ -113,9 +121,9 @@ async def test_full_chatbot_flow():
         }
         
         try:
-            response = await client.post(f"{BASE_URL}/intake", json=intake_data_small_town)
-            response.raise_for_status()
-            intake_result = response.json()
+            async with session.post(f"{BASE_URL}/intake", json=intake_data_small_town) as response:
+                response.raise_for_status()
+                intake_result = orjson.loads(await response.read())
             
             trials = intake_result.get("trials", [])
             
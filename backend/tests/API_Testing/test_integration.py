@@ -12,9 +12,10 @@ backend_path = Path(__file__).parent
 sys.path.insert(0, str(backend_path))
 
 from app.services.clinicaltrials_api import search_clinical_trials
+from ct_client import create_client, install_uvloop
 
 
-async def test_real_api_integration():
+async def test_real_api_integration(client):
     """Test the real API integration"""
     
     print("\n" + "="*70)
@@ -33,7 +34,7 @@ async def test_real_api_integration():
         print("-" * 70)
         
         try:
-            trials = await search_clinical_trials(cancer_type, location)
+            trials = await search_clinical_trials(cancer_type, location, client=client)
             
             if trials:
                 print(f"✅ Found {len(trials)} trials\n")
@@ -70,5 +71,12 @@ async def test_real_api_integration():
     print("="*70 + "\n")
 
 
+async def main():
+    """Run the test with a single shared client"""
+    async with create_client() as client:
+        await test_real_api_integration(client)
+
+
 if __name__ == "__main__":
-    asyncio.run(test_real_api_integration())
+    install_uvloop()
+    asyncio.run(main())
@@ -10,13 +10,15 @@ import httpx
 import asyncio
 import json
 
+from ct_client import CT_API_URL, create_client, install_uvloop
 
-async def test_basic_api_call():
+
+async def test_basic_api_call(client):
     """Test the most basic API call to ClinicalTrials.gov"""
     print("🧪 Testing ClinicalTrials.gov API v2")
     print("=" * 70)
     
-    url = "https://clinicaltrials.gov/api/v2/studies"
+    url = CT_API_URL
     params = {
         "query.cond": "breast cancer",
         "filter.overallStatus": "RECRUITING",
@@ -28,61 +30,60 @@ async def test_basic_api_call():
     print(f"📋 Parameters: {json.dumps(params, indent=2)}\n")
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        print("✅ API call successful!\n")
+        print(f"Total trials found: {data.get('totalCount', 0)}")
+        print(f"Trials in this response: {len(data.get('studies', []))}\n")
+        
+        # Display first trial in detail
+        studies = data.get("studies", [])
+        if studies:
+            print("=" * 70)
+            print("📄 FIRST TRIAL DETAILS")
+            print("=" * 70)
             
-            data = response.json()
+            study = studies[0]
+            protocol = study.get("protocolSection", {})
             
-            print("✅ API call successful!\n")
-            print(f"Total trials found: {data.get('totalCount', 0)}")
-            print(f"Trials in this response: {len(data.get('studies', []))}\n")
+            # Identification
+            identification = protocol.get("identificationModule", {})
+            print(f"\n🆔 NCT ID: {identification.get('nctId')}")
+            print(f"📋 Title: {identification.get('briefTitle')}")
             
-            # Display first trial in detail
-            studies = data.get("studies", [])
-            if studies:
-                print("=" * 70)
-                print("📄 FIRST TRIAL DETAILS")
-                print("=" * 70)
-                
-                study = studies[0]
-                protocol = study.get("protocolSection", {})
-                
-                # Identification
-                identification = protocol.get("identificationModule", {})
-                print(f"\n🆔 NCT ID: {identification.get('nctId')}")
-                print(f"📋 Title: {identification.get('briefTitle')}")
-                
-                # Status
-                status = protocol.get("statusModule", {})
-                print(f"🚦 Status: {status.get('overallStatus')}")
-                
-                # Phase
-                design = protocol.get("designModule", {})
-                phases = design.get("phases", [])
-                print(f"🔬 Phase: {', '.join(phases) if phases else 'Not specified'}")
-                
-                # Location
-                contacts_locations = protocol.get("contactsLocationsModule", {})
-                locations = contacts_locations.get("locations", [])
-                if locations:
-                    loc = locations[0]
-                    print(f"📍 Location: {loc.get('facility')}, {loc.get('city')}, {loc.get('state')}")
-                
-                # Sponsor
-                sponsor_module = protocol.get("sponsorCollaboratorsModule", {})
-                lead_sponsor = sponsor_module.get("leadSponsor", {})
-                print(f"🏢 Sponsor: {lead_sponsor.get('name')}")
-                
-                # Link
-                nct_id = identification.get('nctId')
-                print(f"🔗 Link: https://clinicaltrials.gov/study/{nct_id}")
-                
-                print("\n" + "=" * 70)
-                print("📊 RAW JSON STRUCTURE (first study)")
-                print("=" * 70)
-                print(json.dumps(study, indent=2)[:2000] + "...")  # First 2000 chars
+            # Status
+            status = protocol.get("statusModule", {})
+            print(f"🚦 Status: {status.get('overallStatus')}")
+            
+            # Phase
+            design = protocol.get("designModule", {})
+            phases = design.get("phases", [])
+            print(f"🔬 Phase: {', '.join(phases) if phases else 'Not specified'}")
+            
+            # Location
+            contacts_locations = protocol.get("contactsLocationsModule", {})
+            locations = contacts_locations.get("locations", [])
+            if locations:
+                loc = locations[0]
+                print(f"📍 Location: {loc.get('facility')}, {loc.get('city')}, {loc.get('state')}")
                 
+            # Sponsor
+            sponsor_module = protocol.get("sponsorCollaboratorsModule", {})
+            lead_sponsor = sponsor_module.get("leadSponsor", {})
+            print(f"🏢 Sponsor: {lead_sponsor.get('name')}")
+            
+            # Link
+            nct_id = identification.get('nctId')
+            print(f"🔗 Link: https://clinicaltrials.gov/study/{nct_id}")
+            
+            print("\n" + "=" * 70)
+            print("📊 RAW JSON STRUCTURE (first study)")
+            print("=" * 70)
+            print(json.dumps(study, indent=2)[:2000] + "...")  # First 2000 chars
+            
     except httpx.TimeoutException:
         print("❌ Error: Request timed out")
         print("The API might be slow or unreachable")
@@ -95,12 +96,12 @@ async def test_basic_api_call():
         print(f"❌ Unexpected Error: {e}")
 
 
-async def test_location_search():
+async def test_location_search(client):
     """Test location-based search"""
     print("\n\n🗺️  TESTING LOCATION-BASED SEARCH")
     print("=" * 70)
     
-    url = "https://clinicaltrials.gov/api/v2/studies"
+    url = CT_API_URL
     
     # Test different location formats
     test_locations = [
@@ -122,24 +123,23 @@ async def test_location_search():
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                total = data.get('totalCount', 0)
-                print(f"   ✅ Found {total} trials")
-                
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            total = data.get('totalCount', 0)
+            print(f"   ✅ Found {total} trials")
+            
         except Exception as e:
             print(f"   ❌ Error: {e}")
 
 
-async def test_cancer_types():
+async def test_cancer_types(client):
     """Test different cancer types"""
     print("\n\n🎗️  TESTING DIFFERENT CANCER TYPES")
     print("=" * 70)
     
-    url = "https://clinicaltrials.gov/api/v2/studies"
+    url = CT_API_URL
     
     cancer_types = [
         "breast cancer",
@@ -158,14 +158,13 @@ async def test_cancer_types():
         }
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                total = data.get('totalCount', 0)
-                print(f"   {cancer_type:20s} → {total:5d} recruiting trials")
-                
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            total = data.get('totalCount', 0)
+            print(f"   {cancer_type:20s} → {total:5d} recruiting trials")
+            
         except Exception as e:
             print(f"   {cancer_type:20s} → Error: {e}")
 
@@ -176,9 +175,10 @@ async def main():
     print("=" * 70)
     print("This will test if the real API is accessible and working\n")
     
-    await test_basic_api_call()
-    await test_location_search()
-    await test_cancer_types()
+    async with create_client() as client:
+        await test_basic_api_call(client)
+        await test_location_search(client)
+        await test_cancer_types(client)
     
     print("\n\n✅ TEST COMPLETE!")
     print("=" * 70)
@@ -187,4 +187,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
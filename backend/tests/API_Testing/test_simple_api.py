@@ -3,18 +3,19 @@ Simple, focused test of ClinicalTrials.gov API
 Tests what actually works based on real API behavior
 """
 
-import httpx
 import asyncio
 
+from ct_client import CT_API_URL, create_client, install_uvloop
 
-async def test_working_api_calls():
+
+async def test_working_api_calls(client):
     """Test the API calls that we know work"""
     
     print("\n" + "="*70)
     print("🧪 ClinicalTrials.gov API - Working Examples")
     print("="*70 + "\n")
     
-    base_url = "https://clinicaltrials.gov/api/v2/studies"
+    base_url = CT_API_URL
     
     # Test 1: Basic cancer search (NO location filter)
     print("Test 1: Search for breast cancer trials (no location)")
@@ -27,18 +28,17 @@ async def test_working_api_calls():
         "format": "json"
     }
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(base_url, params=params)
-        data = response.json()
-        
-        studies = data.get("studies", [])
-        print(f"✅ Found {len(studies)} trials in response")
-        
-        if studies:
-            study = studies[0]
-            protocol = study.get("protocolSection", {})
-            identification = protocol.get("identificationModule", {})
-            print(f"   Sample: {identification.get('nctId')} - {identification.get('briefTitle', '')[:60]}...")
+    response = await client.get(base_url, params=params)
+    data = response.json()
+    
+    studies = data.get("studies", [])
+    print(f"✅ Found {len(studies)} trials in response")
+    
+    if studies:
+        study = studies[0]
+        protocol = study.get("protocolSection", {})
+        identification = protocol.get("identificationModule", {})
+        print(f"   Sample: {identification.get('nctId')} - {identification.get('briefTitle', '')[:60]}...")
     
     print()
     
@@ -54,25 +54,24 @@ async def test_working_api_calls():
         "format": "json"
     }
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(base_url, params=params)
-        data = response.json()
-        
-        studies = data.get("studies", [])
-        print(f"✅ Found {len(studies)} trials near Boston, MA")
+    response = await client.get(base_url, params=params)
+    data = response.json()
+    
+    studies = data.get("studies", [])
+    print(f"✅ Found {len(studies)} trials near Boston, MA")
+    
+    if studies:
+        study = studies[0]
+        protocol = study.get("protocolSection", {})
+        identification = protocol.get("identificationModule", {})
+        contacts = protocol.get("contactsLocationsModule", {})
+        locations = contacts.get("locations", [])
         
-        if studies:
-            study = studies[0]
-            protocol = study.get("protocolSection", {})
-            identification = protocol.get("identificationModule", {})
-            contacts = protocol.get("contactsLocationsModule", {})
-            locations = contacts.get("locations", [])
-            
-            print(f"   NCT ID: {identification.get('nctId')}")
-            print(f"   Title: {identification.get('briefTitle', '')[:70]}")
-            if locations:
-                loc = locations[0]
-                print(f"   Location: {loc.get('facility')}, {loc.get('city')}, {loc.get('state')}")
+        print(f"   NCT ID: {identification.get('nctId')}")
+        print(f"   Title: {identification.get('briefTitle', '')[:70]}")
+        if locations:
+            loc = locations[0]
+            print(f"   Location: {loc.get('facility')}, {loc.get('city')}, {loc.get('state')}")
     
     print()
     
@@ -90,11 +89,10 @@ async def test_working_api_calls():
             "format": "json"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(base_url, params=params)
-            data = response.json()
-            studies = data.get("studies", [])
-            print(f"   {cancer:20s} → {len(studies)} trials found")
+        response = await client.get(base_url, params=params)
+        data = response.json()
+        studies = data.get("studies", [])
+        print(f"   {cancer:20s} → {len(studies)} trials found")
     
     print()
     
@@ -119,11 +117,10 @@ async def test_working_api_calls():
             "format": "json"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(base_url, params=params)
-            data = response.json()
-            studies = data.get("studies", [])
-            print(f"   {city:20s} → {len(studies)} trials found")
+        response = await client.get(base_url, params=params)
+        data = response.json()
+        studies = data.get("studies", [])
+        print(f"   {city:20s} → {len(studies)} trials found")
     
     print("\n" + "="*70)
     print("✅ All tests complete!")
@@ -136,5 +133,12 @@ async def test_working_api_calls():
     print()
 
 
+async def main():
+    """Run the test with a single shared client"""
+    async with create_client() as client:
+        await test_working_api_calls(client)
+
+
 if __name__ == "__main__":
-    asyncio.run(test_working_api_calls())
+    install_uvloop()
+    asyncio.run(main())
@@ -10,14 +10,20 @@ This script:
 """
 
 import asyncio
+import atexit
 import httpx
+import orjson
 import csv
+import operator
 import time
 from datetime import datetime
 from pathlib import Path
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any, List
 
+from ct_client import install_uvloop
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,12 +31,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Log banner separators, built once
+_BAR_EQ = '=' * 70
+_BAR_HASH = '#' * 70
+
 # API Configuration
 BASE_URL = "http://localhost:8000"
 CSV_FILE = Path(__file__).parent / "weekend_api_monitoring.csv"
 
+# Seconds between the starts of consecutive test cycles
+TEST_INTERVAL_SECONDS = 1800
+
+@dataclass(slots=True)
+class ConversationRecord:
+    """Metrics for one simulated conversation, one CSV row"""
+    timestamp: str = ''
+    patient_name: str = ''
+    user_id: str = ''
+    cancer_type: str = ''
+    stage: str = ''
+    age: int = 0
+    sex: str = ''
+    location: str = ''
+    comorbidities: str = 'None'
+    prior_treatments: str = 'None'
+    api_query_time: float = 0.0
+    http_status: int = 0
+    trials_found: int = 0
+    has_nationwide: bool = False
+    error_message: str = ''
+    response_message: str = ''
+    sample_nct_id: str = ''
+    sample_title: str = ''
+    sample_location: str = ''
+    sample_facility: str = ''
+
+
+# CSV layout: (ConversationRecord field, header name) in column order
+CSV_FIELDS = (
+    ('timestamp', 'Timestamp'),
+    ('patient_name', 'Patient_Name'),
+    ('user_id', 'User_ID'),
+    ('cancer_type', 'Cancer_Type'),
+    ('stage', 'Stage'),
+    ('age', 'Age'),
+    ('sex', 'Sex'),
+    ('location', 'Location'),
+    ('comorbidities', 'Comorbidities'),
+    ('prior_treatments', 'Prior_Treatments'),
+    ('api_query_time', 'API_Query_Time_Seconds'),
+    ('http_status', 'HTTP_Status_Code'),
+    ('trials_found', 'Trials_Found'),
+    ('has_nationwide', 'Has_Nationwide_Results'),
+    ('error_message', 'Error_Message'),
+    ('response_message', 'Response_Message'),
+    ('sample_nct_id', 'Sample_Trial_NCT_ID'),
+    ('sample_title', 'Sample_Trial_Title'),
+    ('sample_location', 'Sample_Trial_Location'),
+    ('sample_facility', 'Sample_Trial_Facility'),
+)
+_CSV_HEADER = tuple(header for _, header in CSV_FIELDS)
+_csv_row = operator.attrgetter(*(key for key, _ in CSV_FIELDS))
+
+# Scenarios run in parallel each cycle, limited to this many at once
+MAX_CONCURRENT_CONVERSATIONS = 4
+
+# Rows are buffered and appended once per cycle instead of reopening the file per row
+_csv_buffer: List[tuple] = []
+
 # Realistic patient scenarios
-PATIENT_SCENARIOS = [
+PATIENT_SCENARIOS = (
     {
         "name": "John Smith",
         "user_id": "patient_001",
@@ -164,236 +234,233 @@ PATIENT_SCENARIOS = [
         "comorbidities": [],
         "prior_treatments": []
     }
-]
+)
+
+
+def format_history(patient: Dict[str, Any]):
+    """Return the patient's comorbidities and prior treatments as CSV-ready strings"""
+    return (
+        ', '.join(patient.get('comorbidities', [])) or 'None',
+        ', '.join(patient.get('prior_treatments', [])) or 'None'
+    )
+
+
+# Scenarios never change, so their history strings are joined once at import
+_SCENARIO_HISTORY = {patient['user_id']: format_history(patient) for patient in PATIENT_SCENARIOS}
 
 
 def initialize_csv():
     """Create CSV file with headers if it doesn't exist"""
     if not CSV_FILE.exists():
         with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'Timestamp',
-                'Patient_Name',
-                'User_ID',
-                'Cancer_Type',
-                'Stage',
-                'Age',
-                'Sex',
-                'Location',
-                'Comorbidities',
-                'Prior_Treatments',
-                'API_Query_Time_Seconds',
-                'HTTP_Status_Code',
-                'Trials_Found',
-                'Has_Nationwide_Results',
-                'Error_Message',
-                'Response_Message',
-                'Sample_Trial_NCT_ID',
-                'Sample_Trial_Title',
-                'Sample_Trial_Location',
-                'Sample_Trial_Facility'
-            ])
-        logger.info(f"Created CSV file: {CSV_FILE}")
+            csv.writer(f).writerow(_CSV_HEADER)
+        logger.info("Created CSV file: %s", CSV_FILE)
     else:
-        logger.info(f"Using existing CSV file: {CSV_FILE}")
+        logger.info("Using existing CSV file: %s", CSV_FILE)
 
 
-async def simulate_patient_conversation(patient: Dict[str, Any]) -> Dict[str, Any]:
+async def simulate_patient_conversation(patient: Dict[str, Any], client: httpx.AsyncClient) -> ConversationRecord:
     """
     Simulate a real patient conversation with the chatbot
+    Uses the shared client so connections to the API are kept alive between cycles
     Returns conversation data and metrics
     """
-    conversation_data = {
-        'timestamp': datetime.now().isoformat(),
-        'patient_name': patient['name'],
-        'user_id': patient['user_id'],
-        'cancer_type': patient['cancer_type'],
-        'stage': patient['stage'],
-        'age': patient['age'],
-        'sex': patient['sex'],
-        'location': patient['location'],
-        'comorbidities': ', '.join(patient.get('comorbidities', [])) or 'None',
-        'prior_treatments': ', '.join(patient.get('prior_treatments', [])) or 'None',
-        'api_query_time': 0.0,
-        'http_status': 0,
-        'trials_found': 0,
-        'has_nationwide': False,
-        'error_message': '',
-        'response_message': '',
-        'sample_nct_id': '',
-        'sample_title': '',
-        'sample_location': '',
-        'sample_facility': ''
-    }
+    comorbidities, prior_treatments = (
+        _SCENARIO_HISTORY.get(patient['user_id']) or format_history(patient)
+    )
+    conversation_data = ConversationRecord(
+        timestamp=datetime.now().isoformat(),
+        patient_name=patient['name'],
+        user_id=patient['user_id'],
+        cancer_type=patient['cancer_type'],
+        stage=patient['stage'],
+        age=patient['age'],
+        sex=patient['sex'],
+        location=patient['location'],
+        comorbidities=comorbidities,
+        prior_treatments=prior_treatments
+    )
 
-    logger.info(f"\n{'='*70}")
-    logger.info(f"Starting conversation for: {patient['name']}")
-    logger.info(f"Cancer: {patient['cancer_type']}, Location: {patient['location']}")
-    logger.info(f"{'='*70}")
+    logger.info(
+        "\n%s\nStarting conversation for: %s\nCancer: %s, Location: %s\n%s",
+        _BAR_EQ, patient['name'], patient['cancer_type'], patient['location'], _BAR_EQ
+    )
 
     try:
         # Call /intake endpoint (which now calls the real API)
         start_time = time.time()
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{BASE_URL}/intake",
-                json=patient
-            )
+        response = await client.post("/intake", json=patient)
+        
+        query_time = time.time() - start_time
+        conversation_data.api_query_time = round(query_time, 3)
+        conversation_data.http_status = response.status_code
+        
+        logger.info("API Response Time: %.3f seconds", query_time)
+        logger.info("HTTP Status: %s", response.status_code)
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
             
-            query_time = time.time() - start_time
-            conversation_data['api_query_time'] = round(query_time, 3)
-            conversation_data['http_status'] = response.status_code
+            # Extract response data
+            response_message = result.get('response', '')
+            trials = result.get('trials') or ()
+            trials_found = len(trials)
+            conversation_data.response_message = response_message
+            conversation_data.trials_found = trials_found
             
-            logger.info(f"API Response Time: {query_time:.3f} seconds")
-            logger.info(f"HTTP Status: {response.status_code}")
+            logger.info("Trials Found: %d", trials_found)
+            logger.info("Response: %s", response_message)
             
-            if response.status_code == 200:
-                result = response.json()
+            if trials_found:
+                # Check for nationwide results
+                has_nationwide = any(t.get('is_nationwide', False) for t in trials)
+                conversation_data.has_nationwide = has_nationwide
                 
-                # Extract response data
-                conversation_data['response_message'] = result.get('response', '')
-                trials = result.get('trials', [])
-                conversation_data['trials_found'] = len(trials)
+                # Store first trial as sample
+                first_trial = trials[0]
+                nct_id = first_trial.get('nct_id', '')
+                title = first_trial.get('title') or ''
+                conversation_data.sample_nct_id = nct_id
+                conversation_data.sample_title = title[:100]
+                conversation_data.sample_location = first_trial.get('location', '')
+                conversation_data.sample_facility = first_trial.get('facility', '')
                 
-                logger.info(f"Trials Found: {len(trials)}")
-                logger.info(f"Response: {result.get('response', '')}")
+                logger.info("Sample Trial: %s - %s...", nct_id, title[:50])
                 
-                if trials:
-                    # Check for nationwide results
-                    conversation_data['has_nationwide'] = any(
-                        t.get('is_nationwide', False) for t in trials
-                    )
-                    
-                    # Store first trial as sample
-                    first_trial = trials[0]
-                    conversation_data['sample_nct_id'] = first_trial.get('nct_id', '')
-                    conversation_data['sample_title'] = first_trial.get('title', '')[:100]
-                    conversation_data['sample_location'] = first_trial.get('location', '')
-                    conversation_data['sample_facility'] = first_trial.get('facility', '')
-                    
-                    logger.info(f"Sample Trial: {first_trial.get('nct_id')} - {first_trial.get('title', '')[:50]}...")
-                    
-                    if conversation_data['has_nationwide']:
-                        logger.info("⚠️  Nationwide fallback triggered (small town)")
-                else:
-                    logger.warning("No trials returned")
-                    
+                if has_nationwide:
+                    logger.info("⚠️  Nationwide fallback triggered (small town)")
             else:
-                error_msg = f"HTTP {response.status_code}: {response.text[:200]}"
-                conversation_data['error_message'] = error_msg
-                logger.error(f"API Error: {error_msg}")
+                logger.warning("No trials returned")
                 
+        else:
+            error_msg = f"HTTP {response.status_code}: {response.text[:200]}"
+            conversation_data.error_message = error_msg
+            logger.error("API Error: %s", error_msg)
+            
     except httpx.TimeoutException as e:
         error_msg = f"Timeout after 30 seconds: {str(e)}"
-        conversation_data['error_message'] = error_msg
-        logger.error(f"Timeout Error: {error_msg}")
+        conversation_data.error_message = error_msg
+        logger.error("Timeout Error: %s", error_msg)
         
     except httpx.RequestError as e:
         error_msg = f"Request Error: {str(e)}"
-        conversation_data['error_message'] = error_msg
-        logger.error(f"Request Error: {error_msg}")
+        conversation_data.error_message = error_msg
+        logger.error("Request Error: %s", error_msg)
         
     except Exception as e:
         error_msg = f"Unexpected Error: {str(e)}"
-        conversation_data['error_message'] = error_msg
-        logger.error(f"Unexpected Error: {error_msg}")
+        conversation_data.error_message = error_msg
+        logger.error("Unexpected Error: %s", error_msg)
 
     return conversation_data
 
 
-def write_to_csv(conversation_data: Dict[str, Any]):
-    """Append conversation data to CSV file"""
-    with open(CSV_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            conversation_data['timestamp'],
-            conversation_data['patient_name'],
-            conversation_data['user_id'],
-            conversation_data['cancer_type'],
-            conversation_data['stage'],
-            conversation_data['age'],
-            conversation_data['sex'],
-            conversation_data['location'],
-            conversation_data['comorbidities'],
-            conversation_data['prior_treatments'],
-            conversation_data['api_query_time'],
-            conversation_data['http_status'],
-            conversation_data['trials_found'],
-            conversation_data['has_nationwide'],
-            conversation_data['error_message'],
-            conversation_data['response_message'],
-            conversation_data['sample_nct_id'],
-            conversation_data['sample_title'],
-            conversation_data['sample_location'],
-            conversation_data['sample_facility']
-        ])
-    logger.info(f"✓ Logged to CSV: {CSV_FILE.name}")
-
-
-async def run_test_cycle():
+def write_to_csv(conversation_data: ConversationRecord):
+    """Queue conversation data for the CSV file; flush_csv() writes the batch"""
+    _csv_buffer.append(_csv_row(conversation_data))
+
+
+def flush_csv():
+    """Append all buffered rows to the CSV file in one write"""
+    if not _csv_buffer:
+        return
+    
+    with open(CSV_FILE, 'a', newline='', encoding='utf-8', buffering=64 * 1024) as f:
+        csv.writer(f).writerows(_csv_buffer)
+    
+    logger.info("✓ Logged %d rows to CSV: %s", len(_csv_buffer), CSV_FILE.name)
+    _csv_buffer.clear()
+
+
+async def run_test_cycle(client: httpx.AsyncClient):
     """Run one complete test cycle with all patient scenarios"""
-    logger.info(f"\n{'#'*70}")
-    logger.info(f"Starting Test Cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"{'#'*70}\n")
+    logger.info(
+        "\n%s\nStarting Test Cycle at %s\n%s\n",
+        _BAR_HASH, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), _BAR_HASH
+    )
     
-    # Rotate through patient scenarios
-    import random
-    patient = random.choice(PATIENT_SCENARIOS)
+    # Run every patient scenario concurrently, a few at a time
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CONVERSATIONS)
     
-    # Simulate conversation
-    conversation_data = await simulate_patient_conversation(patient)
+    async def run_one(patient: Dict[str, Any]) -> ConversationRecord:
+        async with semaphore:
+            return await simulate_patient_conversation(patient, client)
     
-    # Write to CSV
-    write_to_csv(conversation_data)
+    results = await asyncio.gather(
+        *(run_one(patient) for patient in PATIENT_SCENARIOS),
+        return_exceptions=True
+    )
     
-    logger.info(f"\n{'#'*70}")
-    logger.info(f"Test Cycle Complete at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"Next test in 30 minutes")
-    logger.info(f"{'#'*70}\n")
+    # Write the whole cycle to CSV in one batch
+    for conversation_data in results:
+        if isinstance(conversation_data, ConversationRecord):
+            write_to_csv(conversation_data)
+        else:
+            logger.error("Conversation failed: %r", conversation_data)
+    flush_csv()
+    
+    logger.info(
+        "\n%s\nTest Cycle Complete at %s\nNext test in 30 minutes\n%s\n",
+        _BAR_HASH, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), _BAR_HASH
+    )
 
 
 async def main():
     """Main monitoring loop - runs every 30 minutes"""
     print(f"""
-{'='*70}
+{_BAR_EQ}
 Weekend API Monitoring Started
-{'='*70}
+{_BAR_EQ}
 Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Test Interval: 30 minutes
 CSV Log File: {CSV_FILE}
 Patient Scenarios: {len(PATIENT_SCENARIOS)}
-{'='*70}
+{_BAR_EQ}
 
 Monitoring will run continuously until stopped (Ctrl+C)
     """)
     
-    # Initialize CSV
+    # Initialize CSV, making sure buffered rows are written on shutdown
     initialize_csv()
+    atexit.register(flush_csv)
     
     test_count = 0
+    start = time.monotonic()
     
     try:
-        while True:
-            test_count += 1
-            logger.info(f"Test #{test_count}")
-            
-            # Run test cycle
-            await run_test_cycle()
-            
-            # Wait 30 minutes (1800 seconds)
-            logger.info("Sleeping for 30 minutes...")
-            await asyncio.sleep(1800)  # 30 minutes
+        # One pooled client for the whole run, closed on shutdown
+        async with httpx.AsyncClient(
+            base_url=BASE_URL,
+            http2=True,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        ) as client:
+            while True:
+                test_count += 1
+                logger.info("Test #%d", test_count)
+                
+                # Run test cycle
+                await run_test_cycle(client)
+                
+                # Sleep until the next 30-minute tick so cycle duration doesn't add drift
+                delay = start + test_count * TEST_INTERVAL_SECONDS - time.monotonic()
+                if delay < 0:
+                    logger.warning("Cycle overran the test interval by %.1fs", -delay)
+                    delay = 0
+                logger.info("Sleeping for %.0f seconds...", delay)
+                await asyncio.sleep(delay)
             
     except KeyboardInterrupt:
-        print(f"\n{'='*70}")
+        flush_csv()
+        print(f"\n{_BAR_EQ}")
         print("Monitoring Stopped by User")
         print(f"Total Tests Run: {test_count}")
         print(f"CSV Log: {CSV_FILE}")
         print(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'='*70}")
+        print(f"{_BAR_EQ}")
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
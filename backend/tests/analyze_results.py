@@ -5,51 +5,153 @@ Analyzes the CSV results from automated_api_tests.py and generates
 summary statistics and insights for the Tuesday meeting.
 """
 
-import csv
-import statistics
 from pathlib import Path
-from datetime import datetime
-from collections import defaultdict
+
+import pandas as pd
 
 
 RESULTS_DIR = Path(__file__).parent / "test_results"
 RESULTS_FILE = RESULTS_DIR / "api_test_results.csv"
 
+# Columns read from the results CSV; patient details aren't needed for the report
+USECOLS = (
+    'timestamp', 'cancer_type', 'location',
+    'intake_response_time', 'intake_error',
+    'message_response_time', 'message_error',
+    'trials_found', 'total_response_time', 'success',
+)
+
+# Numeric columns and the dtype each is parsed as when loading
+# (nullable Int32 keeps missing values as <NA> instead of upcasting to float)
+INT_FIELDS = ('trials_found',)
+FLOAT_FIELDS = ('intake_response_time', 'message_response_time', 'total_response_time')
+COLUMN_DTYPES = {
+    **{field: 'Int32' for field in INT_FIELDS},
+    **{field: 'float64' for field in FLOAT_FIELDS},
+    'success': 'string',
+}
+
+# Rows parsed per chunk, so only one chunk of the full table is in memory at a time
+CHUNK_SIZE = 10_000
 
-def load_results():
-    """Load test results from CSV file."""
+
+def load_results(chunksize=CHUNK_SIZE):
+    """Yield test results from the CSV file as DataFrame chunks."""
     if not RESULTS_FILE.exists():
         print(f"❌ No results file found at {RESULTS_FILE}")
         print("   Run automated_api_tests.py first to generate data.")
-        return []
-    
-    results = []
-    with open(RESULTS_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Convert numeric fields
-            for field in ['age', 'intake_response_time', 'message_response_time', 
-                         'total_response_time', 'trials_found', 'intake_status', 'message_status']:
-                if row.get(field) and row[field] != 'None':
-                    try:
-                        if field in ['age', 'trials_found', 'intake_status', 'message_status']:
-                            row[field] = int(float(row[field]))
-                        else:
-                            row[field] = float(row[field])
-                    except ValueError:
-                        row[field] = None
-            
+        return
+    
+    with pd.read_csv(RESULTS_FILE, usecols=USECOLS, dtype=COLUMN_DTYPES, na_values=['None'],
+                     encoding='utf-8', chunksize=chunksize) as reader:
+        for chunk in reader:
             # Convert boolean
-            row['success'] = row.get('success', '').lower() == 'true'
-            
-            results.append(row)
+            chunk['success'] = chunk['success'].str.lower().eq('true').fillna(False).astype(bool)
+            chunk['cancer_type'] = chunk['cancer_type'].fillna('Unknown')
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format='ISO8601', cache=True)
+            yield chunk
+
+
+def _combine_counts(parts):
+    """Sum per-chunk value_counts into one Series, most frequent first."""
+    if not parts:
+        return pd.Series(dtype='int64')
+    counts = pd.concat(parts).groupby(level=0, sort=False).sum()
+    return counts.sort_values(ascending=False, kind='stable')
+
+
+def _error_table(error_counts):
+    """Format the five most frequent errors as a text table."""
+    return error_counts.head(5).rename_axis('Error').rename('Occurrences').to_frame().to_string()
+
+
+def summarize_results(chunks):
+    """Reduce result chunks to the totals and per-group stats used by the reports.
+    
+    Every column is reduced chunk by chunk except total_response_time, which is
+    deliberately kept whole (8 bytes per row) so the report's median is exact
+    rather than estimated; that one column grows with the results file.
+    """
+    total_tests = 0
+    successful_tests = 0
+    zero_results = 0
+    first_test = last_test = None
+    response_parts = []
+    endpoint_parts = []
+    cancer_parts = []
+    location_parts = []
+    intake_error_parts = []
+    message_error_parts = []
+    
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        if first_test is None:
+            first_test = chunk['timestamp'].iloc[0]
+        last_test = chunk['timestamp'].iloc[-1]
+        
+        total_tests += len(chunk)
+        successful_tests += int(chunk['success'].sum())
+        zero_results += int((chunk['trials_found'] == 0).sum())
+        
+        # Total response times are kept whole for the exact median (see docstring)
+        response_parts.append(chunk['total_response_time'].dropna())
+        endpoint_parts.append(
+            chunk[['intake_response_time', 'message_response_time']].agg(['count', 'sum', 'min', 'max']).T
+        )
+        cancer_parts.append(chunk.groupby('cancer_type').agg(
+            total=('success', 'size'),
+            successful=('success', 'sum'),
+            trials_count=('trials_found', 'count'),
+            trials_sum=('trials_found', 'sum'),
+            min_trials=('trials_found', 'min'),
+            max_trials=('trials_found', 'max'),
+        ))
+        location_parts.append(chunk['location'].value_counts(sort=False))
+        intake_error_parts.append(chunk['intake_error'].value_counts(sort=False))
+        message_error_parts.append(chunk['message_error'].value_counts(sort=False))
     
-    return results
+    if not total_tests:
+        return None
+    
+    response_times = pd.concat(response_parts)
+    endpoint_stats = pd.concat(endpoint_parts).groupby(level=0).agg(
+        {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+    )
+    endpoint_stats['mean'] = endpoint_stats['sum'] / endpoint_stats['count']
+    
+    # groupby sorts by cancer type
+    cancer_stats = pd.concat(cancer_parts).groupby(level=0).agg({
+        'total': 'sum',
+        'successful': 'sum',
+        'trials_count': 'sum',
+        'trials_sum': 'sum',
+        'min_trials': 'min',
+        'max_trials': 'max',
+    })
+    
+    return {
+        'total_tests': total_tests,
+        'successful_tests': successful_tests,
+        'first_test': first_test,
+        'last_test': last_test,
+        'response_stats': response_times.agg(['count', 'mean', 'median', 'min', 'max', 'std']),
+        'under_3s': int((response_times < 3.0).sum()),
+        'intake_stats': endpoint_stats.loc['intake_response_time'],
+        'message_stats': endpoint_stats.loc['message_response_time'],
+        'cancer_stats': cancer_stats,
+        'location_counts': _combine_counts(location_parts),
+        'intake_errors': _combine_counts(intake_error_parts),
+        'message_errors': _combine_counts(message_error_parts),
+        'trials_count': int(cancer_stats['trials_count'].sum()),
+        'trials_sum': int(cancer_stats['trials_sum'].sum()),
+        'zero_results': zero_results,
+    }
 
 
-def analyze_results(results):
+def analyze_results(summary):
     """Generate comprehensive analysis of test results."""
-    if not results:
+    if not summary:
         print("No results to analyze.")
         return
     
@@ -58,8 +160,8 @@ def analyze_results(results):
     print("="*80)
     
     # Basic stats
-    total_tests = len(results)
-    successful_tests = sum(1 for r in results if r['success'])
+    total_tests = summary['total_tests']
+    successful_tests = summary['successful_tests']
     failed_tests = total_tests - successful_tests
     success_rate = (successful_tests / total_tests * 100) if total_tests > 0 else 0
     
@@ -69,110 +171,86 @@ def analyze_results(results):
     print(f"Successful Tests: {successful_tests} ({success_rate:.1f}%)")
     print(f"Failed Tests: {failed_tests} ({100-success_rate:.1f}%)")
     
-    if results[0].get('timestamp') and results[-1].get('timestamp'):
-        first_test = datetime.fromisoformat(results[0]['timestamp'])
-        last_test = datetime.fromisoformat(results[-1]['timestamp'])
+    first_test, last_test = summary['first_test'], summary['last_test']
+    if pd.notna(first_test) and pd.notna(last_test):
         duration = last_test - first_test
         print(f"Test Period: {first_test.strftime('%Y-%m-%d %H:%M')} to {last_test.strftime('%Y-%m-%d %H:%M')}")
         print(f"Duration: {duration.days} days, {duration.seconds // 3600} hours")
     
     # Response time analysis
-    response_times = [r['total_response_time'] for r in results if r.get('total_response_time') is not None]
-    intake_times = [r['intake_response_time'] for r in results if r.get('intake_response_time') is not None]
-    message_times = [r['message_response_time'] for r in results if r.get('message_response_time') is not None]
+    response_stats = summary['response_stats']
+    intake_stats = summary['intake_stats']
+    message_stats = summary['message_stats']
+    response_count = int(response_stats['count'])
     
-    if response_times:
+    if response_count:
         print(f"\n⏱️  RESPONSE TIME ANALYSIS")
         print("-"*80)
         print(f"Total Response Times:")
-        print(f"  Average: {statistics.mean(response_times):.6f} seconds")
-        print(f"  Median:  {statistics.median(response_times):.6f} seconds")
-        print(f"  Min:     {min(response_times):.6f} seconds")
-        print(f"  Max:     {max(response_times):.6f} seconds")
-        if len(response_times) > 1:
-            print(f"  Std Dev: {statistics.stdev(response_times):.6f} seconds")
+        print(f"  Average: {response_stats['mean']:.6f} seconds")
+        print(f"  Median:  {response_stats['median']:.6f} seconds")
+        print(f"  Min:     {response_stats['min']:.6f} seconds")
+        print(f"  Max:     {response_stats['max']:.6f} seconds")
+        if response_count > 1:
+            print(f"  Std Dev: {response_stats['std']:.6f} seconds")
         
-        under_3s = sum(1 for t in response_times if t < 3.0)
-        print(f"\n  Tests under 3 seconds: {under_3s}/{len(response_times)} ({under_3s/len(response_times)*100:.1f}%)")
+        under_3s = summary['under_3s']
+        print(f"\n  Tests under 3 seconds: {under_3s}/{response_count} ({under_3s/response_count*100:.1f}%)")
         
-        if intake_times:
+        if intake_stats['count']:
             print(f"\nIntake Endpoint:")
-            print(f"  Average: {statistics.mean(intake_times):.6f} seconds")
-            print(f"  Min:     {min(intake_times):.6f} seconds")
-            print(f"  Max:     {max(intake_times):.6f} seconds")
+            print(f"  Average: {intake_stats['mean']:.6f} seconds")
+            print(f"  Min:     {intake_stats['min']:.6f} seconds")
+            print(f"  Max:     {intake_stats['max']:.6f} seconds")
         
-        if message_times:
+        if message_stats['count']:
             print(f"\nMessage Endpoint (Trial Search):")
-            print(f"  Average: {statistics.mean(message_times):.6f} seconds")
-            print(f"  Min:     {min(message_times):.6f} seconds")
-            print(f"  Max:     {max(message_times):.6f} seconds")
+            print(f"  Average: {message_stats['mean']:.6f} seconds")
+            print(f"  Min:     {message_stats['min']:.6f} seconds")
+            print(f"  Max:     {message_stats['max']:.6f} seconds")
     
     # Cancer type breakdown
-    cancer_stats = defaultdict(lambda: {'total': 0, 'successful': 0, 'trials': []})
-    for r in results:
-        cancer_type = r.get('cancer_type', 'Unknown')
-        cancer_stats[cancer_type]['total'] += 1
-        if r['success']:
-            cancer_stats[cancer_type]['successful'] += 1
-        if r.get('trials_found') is not None:
-            cancer_stats[cancer_type]['trials'].append(r['trials_found'])
+    cancer_stats = summary['cancer_stats']
+    cancer_table = pd.DataFrame({
+        'Tests': cancer_stats['total'],
+        'Success Rate %': cancer_stats['successful'] / cancer_stats['total'] * 100,
+        'Avg Trials': (cancer_stats['trials_sum'].astype('float64') / cancer_stats['trials_count']).fillna(0),
+        'Min Trials': cancer_stats['min_trials'],
+        'Max Trials': cancer_stats['max_trials'],
+    })
+    cancer_table.index = cancer_table.index.str.title().rename('Cancer Type')
     
     print(f"\n🎗️  CANCER TYPE BREAKDOWN")
     print("-"*80)
-    for cancer_type in sorted(cancer_stats.keys()):
-        stats = cancer_stats[cancer_type]
-        success_rate = (stats['successful'] / stats['total'] * 100) if stats['total'] > 0 else 0
-        avg_trials = statistics.mean(stats['trials']) if stats['trials'] else 0
-        
-        print(f"\n{cancer_type.title()}:")
-        print(f"  Tests: {stats['total']}")
-        print(f"  Success Rate: {success_rate:.1f}%")
-        print(f"  Avg Trials Found: {avg_trials:.1f}")
-        if stats['trials']:
-            print(f"  Min Trials: {min(stats['trials'])}")
-            print(f"  Max Trials: {max(stats['trials'])}")
+    print(cancer_table.to_string(float_format=lambda x: f"{x:.1f}"))
     
     # Location analysis
-    location_stats = defaultdict(int)
-    for r in results:
-        if r.get('location'):
-            location_stats[r['location']] += 1
-    
     print(f"\n📍 LOCATION COVERAGE")
     print("-"*80)
-    for location in sorted(location_stats.keys(), key=lambda x: location_stats[x], reverse=True):
-        print(f"  {location}: {location_stats[location]} tests")
+    print(summary['location_counts'].rename_axis('Location').rename('Tests').to_frame().to_string())
     
     # Error analysis
-    intake_errors = [r for r in results if r.get('intake_error')]
-    message_errors = [r for r in results if r.get('message_error')]
+    intake_errors = summary['intake_errors']
+    message_errors = summary['message_errors']
     
-    if intake_errors or message_errors:
+    if not intake_errors.empty or not message_errors.empty:
         print(f"\n⚠️  ERROR ANALYSIS")
         print("-"*80)
         
-        if intake_errors:
-            print(f"Intake Endpoint Errors: {len(intake_errors)}")
-            error_types = defaultdict(int)
-            for r in intake_errors:
-                error_types[r['intake_error']] += 1
-            for error, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:5]:
-                print(f"  - {error}: {count} occurrences")
+        if not intake_errors.empty:
+            print(f"Intake Endpoint Errors: {intake_errors.sum()}")
+            print(_error_table(intake_errors))
         
-        if message_errors:
-            print(f"\nMessage Endpoint Errors: {len(message_errors)}")
-            error_types = defaultdict(int)
-            for r in message_errors:
-                error_types[r['message_error']] += 1
-            for error, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:5]:
-                print(f"  - {error}: {count} occurrences")
+        if not message_errors.empty:
+            print(f"\nMessage Endpoint Errors: {message_errors.sum()}")
+            print(_error_table(message_errors))
     
     # Recommendations
     print(f"\n💡 RECOMMENDATIONS FOR TUESDAY MEETING")
     print("-"*80)
     
-    if response_times:
-        avg_time = statistics.mean(response_times)
+    if response_count:
+        avg_time = response_stats['mean']
         if avg_time >= 3.0:
             print("❗ Average response time exceeds 3 second target")
             print("   → Consider optimizing API queries or caching")
@@ -186,7 +264,7 @@ def analyze_results(results):
         print(f"✅ Success rate ({success_rate:.1f}%) is excellent")
     
     # Check if all cancer types tested
-    cancer_types_tested = set(cancer_stats.keys())
+    cancer_types_tested = set(cancer_stats.index)
     expected_types = {"breast cancer", "prostate cancer", "lung cancer"}
     missing_types = expected_types - cancer_types_tested
     
@@ -196,26 +274,26 @@ def analyze_results(results):
         print("✅ All three cancer types tested successfully")
     
     # Trials found analysis
-    all_trials = [r['trials_found'] for r in results if r.get('trials_found') is not None]
-    if all_trials:
-        avg_trials = statistics.mean(all_trials)
-        zero_results = sum(1 for t in all_trials if t == 0)
+    trials_count = summary['trials_count']
+    if trials_count:
+        avg_trials = summary['trials_sum'] / trials_count
+        zero_results = summary['zero_results']
         print(f"\n📊 Trial Results:")
         print(f"   Average trials per search: {avg_trials:.1f}")
         if zero_results > 0:
-            print(f"   Searches with no results: {zero_results}/{len(all_trials)} ({zero_results/len(all_trials)*100:.1f}%)")
+            print(f"   Searches with no results: {zero_results}/{trials_count} ({zero_results/trials_count*100:.1f}%)")
     
     print("\n" + "="*80 + "\n")
 
 
 def generate_summary_report():
     """Generate a concise summary report for the meeting."""
-    results = load_results()
+    summary = summarize_results(load_results())
     
-    if not results:
+    if not summary:
         return
     
-    analyze_results(results)
+    analyze_results(summary)
     
     # Generate CSV summary
     summary_file = RESULTS_DIR / "summary_report.txt"
@@ -223,23 +301,21 @@ def generate_summary_report():
         f.write("MaleCare ChatBot - API Performance Test Summary\n")
         f.write("="*80 + "\n\n")
         
-        total_tests = len(results)
-        successful_tests = sum(1 for r in results if r['success'])
+        total_tests = summary['total_tests']
+        successful_tests = summary['successful_tests']
         success_rate = (successful_tests / total_tests * 100) if total_tests > 0 else 0
         
         f.write(f"Total Tests: {total_tests}\n")
         f.write(f"Success Rate: {success_rate:.1f}%\n\n")
         
-        response_times = [r['total_response_time'] for r in results if r.get('total_response_time') is not None]
-        if response_times:
-            f.write(f"Average Response Time: {statistics.mean(response_times):.6f} seconds\n")
-            f.write(f"Target (<3s): {'PASS' if statistics.mean(response_times) < 3.0 else 'FAIL'}\n\n")
+        response_stats = summary['response_stats']
+        if response_stats['count']:
+            avg_time = response_stats['mean']
+            f.write(f"Average Response Time: {avg_time:.6f} seconds\n")
+            f.write(f"Target (<3s): {'PASS' if avg_time < 3.0 else 'FAIL'}\n\n")
         
         f.write("Cancer Types Tested:\n")
-        cancer_stats = defaultdict(int)
-        for r in results:
-            cancer_stats[r.get('cancer_type', 'Unknown')] += 1
-        for cancer_type, count in sorted(cancer_stats.items()):
+        for cancer_type, count in summary['cancer_stats']['total'].items():
             f.write(f"  - {cancer_type}: {count} tests\n")
     
     print(f"✅ Summary report saved to: {summary_file}")
@@ -11,22 +11,57 @@ Results are saved to CSV files for analysis.
 """
 
 import asyncio
-import httpx
+import sys
+import aiohttp
 import random
 import time
 import csv
-from datetime import datetime, timedelta
+import itertools
 from pathlib import Path
 import json
+import msgspec
+import numpy as np
+from collections import namedtuple
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 TEST_DURATION_DAYS = 7
 TEST_INTERVAL_MINUTES = 30
+BATCH_SIZE = 20  # Concurrent patient tests launched each interval
+CSV_FLUSH_EVERY = 20  # Results buffered before each CSV flush
+QUIET = False  # Skip per-test console output (--quiet)
+
+
+class MessageResponse(msgspec.Struct):
+    """The part of a /message response the tests read; trials are counted, not decoded"""
+    trials: list[msgspec.Raw] = []
+
+
+_encode = msgspec.json.Encoder().encode
+_decode_message = msgspec.json.Decoder(MessageResponse).decode
+
+
+# Fire-and-forget end-session tasks, referenced here until they finish
+_pending = set()
+
+# Run-wide sequence appended to user_ids so concurrent tests never share a session
+_user_seq = itertools.count(1)
+
+# Result CSV columns, in the order test_api_endpoint builds each row
+FIELDNAMES = (
+    "timestamp", "user_id", "cancer_type", "stage", "age", "sex", "location",
+    "intake_response_time", "intake_status", "intake_error",
+    "message_response_time", "message_status", "message_error",
+    "trials_found", "total_response_time", "success",
+)
 RESULTS_DIR = Path(__file__).parent / "test_results"
+if not RESULTS_DIR.exists():
+    RESULTS_DIR.mkdir()
+REQUEST_TIMEOUT = 10.0
+JSON_HEADERS = {"Content-Type": "application/json"}
+TRIAL_SEARCH_MESSAGE = "Find me clinical trials"
 
 # Test data pools
-CANCER_TYPES = ["breast cancer", "prostate cancer", "lung cancer"]
 STAGES = ["stage 1", "stage 2", "stage 3", "stage 4"]
 LOCATIONS = [
     "Phoenix Arizona",
@@ -45,61 +80,145 @@ FIRST_NAMES_MALE = ["Liam", "Noah", "William", "James", "Oliver", "Benjamin", "E
 COMORBIDITIES_POOL = ["diabetes", "hypertension", "heart disease", "asthma", "arthritis"]
 TREATMENTS_POOL = ["chemotherapy", "radiation", "surgery", "immunotherapy", "hormone therapy"]
 
+# Age range per cancer type (appropriate range for cancer patients)
+AGE_RANGES = {
+    "breast cancer": (40, 75),    # Breast cancer peaks in middle age
+    "prostate cancer": (50, 80),  # Prostate cancer more common in older men
+    "lung cancer": (45, 80),      # Lung cancer typically older patients
+}
+NAME_POOLS = {"female": FIRST_NAMES_FEMALE, "male": FIRST_NAMES_MALE}
+
+# Percentage of each cancer type's patients by sex
+SEX_WEIGHTS = (
+    ("breast cancer", "female", 99),  # 99% female for breast cancer
+    ("breast cancer", "male", 1),
+    ("prostate cancer", "male", 100),  # 100% male for prostate cancer
+    ("lung cancer", "male", 50),
+    ("lung cancer", "female", 50),
+)
+
+PatientProfile = namedtuple("PatientProfile", "cancer_type sex name_pool age_lo age_hi")
+
+# Flat table with each profile repeated by its weight, so one random pick selects
+# cancer type, sex, name pool and age range together (cancer types equally likely)
+_PROFILES = tuple(
+    PatientProfile(cancer_type, sex, NAME_POOLS[sex], *AGE_RANGES[cancer_type])
+    for cancer_type, sex, weight in SEX_WEIGHTS
+    for _ in range(weight)
+)
+
+_choice = random.choice
+_randint = random.randint
+_sample = random.sample
+
+# Column views of the profile table for vectorized batch generation
+_rng = np.random.default_rng()
+_PROFILE_AGE_LO = np.array([profile.age_lo for profile in _PROFILES])
+_PROFILE_AGE_HI = np.array([profile.age_hi for profile in _PROFILES])
+_PROFILE_POOL_SIZE = np.array([len(profile.name_pool) for profile in _PROFILES])
+
+
+def _format_time(epoch, fmt='%Y-%m-%d %H:%M:%S'):
+    """Format an epoch timestamp in local time."""
+    return time.strftime(fmt, time.localtime(epoch))
+
+
+def _iso_timestamp(epoch):
+    """Local-time ISO 8601 timestamp with microseconds, as datetime.isoformat() gives."""
+    return f"{_format_time(epoch, '%Y-%m-%dT%H:%M:%S')}.{int(epoch % 1 * 1_000_000):06d}"
+
 
 def generate_random_patient():
     """Generate random patient data for testing."""
-    # Select cancer type
-    cancer_type = random.choice(CANCER_TYPES)
-    
-    # Set sex based on cancer type probabilities
-    if cancer_type == "breast cancer":
-        sex = "female" if random.random() < 0.99 else "male"  # 99% female for breast cancer
-    elif cancer_type == "prostate cancer":
-        sex = "male"  # 100% male for prostate cancer
-    else:  # lung cancer
-        sex = random.choice(["male", "female"])
-    
-    # Select appropriate first name
-    if sex == "female":
-        first_name = random.choice(FIRST_NAMES_FEMALE)
-    else:
-        first_name = random.choice(FIRST_NAMES_MALE)
-    
-    # Generate user_id from name
-    user_id = f"{first_name.lower()}_{random.randint(100, 999)}"
+    # Select cancer type, sex, name pool and age range in one weighted pick
+    profile = _choice(_PROFILES)
+    first_name = _choice(profile.name_pool)
     
-    # Generate age (appropriate range for cancer patients)
-    if cancer_type == "prostate cancer":
-        age = random.randint(50, 80)  # Prostate cancer more common in older men
-    elif cancer_type == "breast cancer":
-        age = random.randint(40, 75)  # Breast cancer peaks in middle age
-    else:  # lung cancer
-        age = random.randint(45, 80)  # Lung cancer typically older patients
+    # Generate user_id from name; the sequence number keeps it unique within the run
+    user_id = f"{first_name.lower()}_{_randint(100, 999)}_{next(_user_seq)}"
     
-    # Random comorbidities (0-3)
-    num_comorbidities = random.randint(0, 3)
-    comorbidities = random.sample(COMORBIDITIES_POOL, num_comorbidities) if num_comorbidities > 0 else []
+    age = _randint(profile.age_lo, profile.age_hi)
     
-    # Random prior treatments (0-2)
-    num_treatments = random.randint(0, 2)
-    prior_treatments = random.sample(TREATMENTS_POOL, num_treatments) if num_treatments > 0 else []
+    # Random comorbidities (0-3) and prior treatments (0-2); sample(pool, 0) is []
+    comorbidities = _sample(COMORBIDITIES_POOL, _randint(0, 3))
+    prior_treatments = _sample(TREATMENTS_POOL, _randint(0, 2))
     
     return {
         "user_id": user_id,
-        "cancer_type": cancer_type,
-        "stage": random.choice(STAGES),
+        "cancer_type": profile.cancer_type,
+        "stage": _choice(STAGES),
         "age": age,
-        "sex": sex,
-        "location": random.choice(LOCATIONS),
+        "sex": profile.sex,
+        "location": _choice(LOCATIONS),
         "comorbidities": comorbidities,
         "prior_treatments": prior_treatments
     }
 
 
-async def test_api_endpoint(patient_data):
+def create_session():
+    """Create the pooled session shared by every test in a run."""
+    return aiohttp.ClientSession(
+        base_url=API_BASE_URL,
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    )
+
+
+def _sample_rows(pool, counts):
+    """Draw counts[i] distinct items from pool for each row i."""
+    # Sorting random keys gives an independent random permutation per row
+    order = _rng.random((len(counts), len(pool))).argsort(axis=1)
+    return [[pool[j] for j in row[:k]] for row, k in zip(order.tolist(), counts.tolist())]
+
+
+def generate_patient_batch(n):
+    """Generate n random patients, drawing each field for the whole batch at once."""
+    profile_idx = _rng.integers(0, len(_PROFILES), size=n)
+    name_idx = (_rng.random(n) * _PROFILE_POOL_SIZE[profile_idx]).astype(int)
+    suffixes = _rng.integers(100, 1000, size=n)
+    ages = _rng.integers(_PROFILE_AGE_LO[profile_idx], _PROFILE_AGE_HI[profile_idx] + 1)
+    stages = _rng.integers(0, len(STAGES), size=n)
+    locations = _rng.integers(0, len(LOCATIONS), size=n)
+    comorbidities = _sample_rows(COMORBIDITIES_POOL, _rng.integers(0, 4, size=n))
+    prior_treatments = _sample_rows(TREATMENTS_POOL, _rng.integers(0, 3, size=n))
+    
+    patients = []
+    for i, (p, name, suffix, age, stage, location) in enumerate(zip(
+            profile_idx.tolist(), name_idx.tolist(), suffixes.tolist(),
+            ages.tolist(), stages.tolist(), locations.tolist())):
+        profile = _PROFILES[p]
+        patients.append({
+            "user_id": f"{profile.name_pool[name].lower()}_{suffix}_{next(_user_seq)}",
+            "cancer_type": profile.cancer_type,
+            "stage": STAGES[stage],
+            "age": age,
+            "sex": profile.sex,
+            "location": LOCATIONS[location],
+            "comorbidities": comorbidities[i],
+            "prior_treatments": prior_treatments[i]
+        })
+    return patients
+
+
+async def _end_session(session, end_session_body):
+    """Clear a test user's session, ignoring failures."""
+    try:
+        async with session.post("/end-session", data=end_session_body, headers=JSON_HEADERS) as end_response:
+            await end_response.read()
+    except Exception:
+        pass  # Don't fail the test if cleanup fails
+
+
+async def _drain_pending():
+    """Wait for background end-session calls before the session closes."""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+async def test_api_endpoint(patient_data, session):
     """Test the API with given patient data and record metrics."""
     results = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _iso_timestamp(time.time()),
         "user_id": patient_data["user_id"],
         "cancer_type": patient_data["cancer_type"],
         "stage": patient_data["stage"],
@@ -117,181 +236,224 @@ async def test_api_endpoint(patient_data):
         "success": False
     }
     
-    total_start = time.time()
+    # Encode every request body before the clock starts
+    user_id = patient_data["user_id"]
+    intake_body = _encode(patient_data)
+    message_body = _encode({"user_id": user_id, "message": TRIAL_SEARCH_MESSAGE})
+    end_session_body = _encode({"user_id": user_id})
+    
+    total_start = time.perf_counter()
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Test 1: Submit intake form
-            intake_start = time.time()
-            try:
-                intake_response = await client.post(
-                    f"{API_BASE_URL}/intake",
-                    json=patient_data
-                )
-                intake_time = time.time() - intake_start
-                results["intake_response_time"] = round(intake_time, 6)
-                results["intake_status"] = intake_response.status_code
-                
-                if intake_response.status_code != 200:
-                    results["intake_error"] = f"Status {intake_response.status_code}"
-                    return results
-                    
-            except Exception as e:
-                results["intake_error"] = str(e)
-                results["intake_response_time"] = time.time() - intake_start
-                return results
+        # Test 1: Submit intake form
+        intake_start = time.perf_counter()
+        try:
+            async with session.post("/intake", data=intake_body, headers=JSON_HEADERS) as intake_response:
+                await intake_response.read()
+            intake_time = time.perf_counter() - intake_start
+            results["intake_response_time"] = round(intake_time, 6)
+            results["intake_status"] = intake_response.status
             
-            # Test 2: Send message to find trials
-            message_start = time.time()
-            try:
-                message_response = await client.post(
-                    f"{API_BASE_URL}/message",
-                    json={
-                        "user_id": patient_data["user_id"],
-                        "message": "Find me clinical trials"
-                    }
-                )
-                message_time = time.time() - message_start
-                results["message_response_time"] = round(message_time, 6)
-                results["message_status"] = message_response.status_code
-                
-                if message_response.status_code == 200:
-                    response_data = message_response.json()
-                    if "trials" in response_data:
-                        results["trials_found"] = len(response_data["trials"])
-                    results["success"] = True
-                else:
-                    results["message_error"] = f"Status {message_response.status_code}"
-                    
-            except Exception as e:
-                results["message_error"] = str(e)
-                results["message_response_time"] = time.time() - message_start
+            if intake_response.status != 200:
+                results["intake_error"] = f"Status {intake_response.status}"
                 return results
+                
+        except Exception as e:
+            results["intake_error"] = str(e)
+            results["intake_response_time"] = time.perf_counter() - intake_start
+            return results
+        
+        # Test 2: Send message to find trials
+        message_start = time.perf_counter()
+        try:
+            async with session.post("/message", data=message_body, headers=JSON_HEADERS) as message_response:
+                response_data = _decode_message(await message_response.read()) if message_response.status == 200 else None
+            message_time = time.perf_counter() - message_start
+            results["message_response_time"] = round(message_time, 6)
+            results["message_status"] = message_response.status
             
-            # Clean up: End session
-            try:
-                await client.post(
-                    f"{API_BASE_URL}/end-session",
-                    json={"user_id": patient_data["user_id"]}
-                )
-            except:
-                pass  # Don't fail the test if cleanup fails
+            if response_data is not None:
+                results["trials_found"] = len(response_data.trials)
+                results["success"] = True
+            else:
+                results["message_error"] = f"Status {message_response.status}"
+                
+        except Exception as e:
+            results["message_error"] = str(e)
+            results["message_response_time"] = time.perf_counter() - message_start
+            return results
+        
+        # Clean up: End session in the background, outside the measured time
+        task = asyncio.create_task(_end_session(session, end_session_body))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
                 
     except Exception as e:
         results["intake_error"] = f"Connection error: {str(e)}"
     
-    results["total_response_time"] = round(time.time() - total_start, 6)
+    results["total_response_time"] = round(time.perf_counter() - total_start, 6)
     return results
 
 
-def save_results_to_csv(results, filename="api_test_results.csv"):
-    """Save test results to CSV file."""
-    RESULTS_DIR.mkdir(exist_ok=True)
-    filepath = RESULTS_DIR / filename
+class CSVResultWriter:
+    """Append test results to a CSV file through one long-lived buffered writer."""
     
-    # Check if file exists to determine if we need headers
-    file_exists = filepath.exists()
+    def __init__(self, filename="api_test_results.csv", flush_every=CSV_FLUSH_EVERY):
+        self.filepath = RESULTS_DIR / filename
+        self.flush_every = flush_every
+        self._file = open(self.filepath, 'a', newline='', encoding='utf-8', buffering=65536)
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES)
+        # Append mode starts at the end of the file, so a non-zero offset means the header exists
+        self._header_written = self._file.tell() > 0
+        self._pending = 0
     
-    with open(filepath, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=results.keys())
-        
-        if not file_exists:
-            writer.writeheader()
-        
-        writer.writerow(results)
+    def write(self, results):
+        """Queue one result row, flushing to disk every `flush_every` rows."""
+        if not self._header_written:
+            self._writer.writeheader()
+            self._header_written = True
+        self._writer.writerow(results)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered rows to disk."""
+        if self._pending:
+            self._file.flush()
+            print(f"✓ {self._pending} result(s) saved to {self.filepath}")
+            self._pending = 0
     
-    print(f"✓ Results saved to {filepath}")
+    def close(self):
+        """Flush remaining rows and close the file."""
+        self.flush()
+        self._file.close()
 
 
 def print_results(results):
-    """Print formatted test results."""
-    print("\n" + "="*70)
-    print(f"Test Run: {results['timestamp']}")
-    print("="*70)
-    print(f"Patient: {results['user_id']}")
-    print(f"Cancer Type: {results['cancer_type']}")
-    print(f"Stage: {results['stage']}")
-    print(f"Age: {results['age']} | Sex: {results['sex']}")
-    print(f"Location: {results['location']}")
-    print("-"*70)
+    """Print formatted test results as a single stdout write."""
+    if QUIET:
+        return
+    
+    parts = [
+        "\n" + "="*70,
+        f"Test Run: {results['timestamp']}",
+        "="*70,
+        f"Patient: {results['user_id']}",
+        f"Cancer Type: {results['cancer_type']}",
+        f"Stage: {results['stage']}",
+        f"Age: {results['age']} | Sex: {results['sex']}",
+        f"Location: {results['location']}",
+        "-"*70,
+    ]
     
     if results['intake_error']:
-        print(f"❌ Intake Error: {results['intake_error']}")
+        parts.append(f"❌ Intake Error: {results['intake_error']}")
     else:
-        print(f"✓ Intake Response Time: {results['intake_response_time']:.6f} seconds")
+        parts.append(f"✓ Intake Response Time: {results['intake_response_time']:.6f} seconds")
     
     if results['message_error']:
-        print(f"❌ Message Error: {results['message_error']}")
+        parts.append(f"❌ Message Error: {results['message_error']}")
     else:
-        print(f"✓ Message Response Time: {results['message_response_time']:.6f} seconds")
-        print(f"✓ Trials Found: {results['trials_found']}")
+        parts.append(f"✓ Message Response Time: {results['message_response_time']:.6f} seconds")
+        parts.append(f"✓ Trials Found: {results['trials_found']}")
     
-    print(f"\n📊 Total Response Time: {results['total_response_time']:.6f} seconds")
+    parts.append(f"\n📊 Total Response Time: {results['total_response_time']:.6f} seconds")
     
     if results['success']:
-        print("✅ Test Status: SUCCESS")
+        parts.append("✅ Test Status: SUCCESS")
         if results['total_response_time'] > 3.0:
-            print("⚠️  WARNING: Response time exceeded 3 second target!")
+            parts.append("⚠️  WARNING: Response time exceeded 3 second target!")
     else:
-        print("❌ Test Status: FAILED")
+        parts.append("❌ Test Status: FAILED")
     
-    print("="*70 + "\n")
+    parts.append("="*70 + "\n")
+    sys.stdout.write("\n".join(parts) + "\n")
+    sys.stdout.flush()
 
 
-async def run_single_test():
+async def run_single_test(session, csv_writer, patient_data=None):
     """Run a single test iteration."""
-    patient_data = generate_random_patient()
+    if patient_data is None:
+        patient_data = generate_random_patient()
     
-    print(f"\n🧪 Running test with: {patient_data['user_id']}")
-    print(f"   Cancer Type: {patient_data['cancer_type']}")
-    print(f"   Location: {patient_data['location']}")
+    if not QUIET:
+        sys.stdout.write(
+            f"\n🧪 Running test with: {patient_data['user_id']}\n"
+            f"   Cancer Type: {patient_data['cancer_type']}\n"
+            f"   Location: {patient_data['location']}\n"
+        )
     
-    results = await test_api_endpoint(patient_data)
+    results = await test_api_endpoint(patient_data, session)
     print_results(results)
-    save_results_to_csv(results)
+    csv_writer.write(results)
     
     return results
 
 
 async def run_continuous_tests():
     """Run tests continuously every 30 minutes for 1 week."""
-    end_time = datetime.now() + timedelta(days=TEST_DURATION_DAYS)
+    start_epoch = time.time()
+    end_epoch = start_epoch + TEST_DURATION_DAYS * 24 * 60 * 60
     test_count = 0
     
     print("\n" + "🚀"*35)
     print("MaleCare ChatBot - Automated API Performance Testing")
     print("🚀"*35)
-    print(f"\nStart Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"End Time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"\nStart Time: {_format_time(start_epoch)}")
+    print(f"End Time: {_format_time(end_epoch)}")
     print(f"Test Interval: {TEST_INTERVAL_MINUTES} minutes")
-    print(f"Expected Tests: {int((TEST_DURATION_DAYS * 24 * 60) / TEST_INTERVAL_MINUTES)}")
+    print(f"Tests per Interval: {BATCH_SIZE}")
+    print(f"Expected Tests: {int((TEST_DURATION_DAYS * 24 * 60) / TEST_INTERVAL_MINUTES) * BATCH_SIZE}")
     print("\nPress Ctrl+C to stop\n")
     
+    csv_writer = CSVResultWriter()
     try:
-        while datetime.now() < end_time:
-            test_count += 1
-            print(f"\n{'='*70}")
-            print(f"Test #{test_count} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"{'='*70}")
-            
-            await run_single_test()
-            
-            # Calculate next run time
-            next_run = datetime.now() + timedelta(minutes=TEST_INTERVAL_MINUTES)
-            
-            if next_run > end_time:
-                print("\n✅ Test duration complete!")
-                break
-            
-            print(f"\n⏰ Next test at: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"   Waiting {TEST_INTERVAL_MINUTES} minutes...")
+        # One keep-alive session for the whole run, closed when testing stops
+        async with create_session() as session:
+            next_fire = time.monotonic()
+            while (batch_epoch := time.time()) < end_epoch:
+                next_fire += TEST_INTERVAL_MINUTES * 60
+                print(f"\n{'='*70}")
+                print(f"Tests #{test_count + 1}-{test_count + BATCH_SIZE} - {_format_time(batch_epoch)}")
+                print(f"{'='*70}")
+                
+                # Burst of concurrent tests sharing the session's connection pool
+                batch = await asyncio.gather(
+                    *(run_single_test(session, csv_writer, patient)
+                      for patient in generate_patient_batch(BATCH_SIZE)),
+                    return_exceptions=True
+                )
+                test_count += BATCH_SIZE
+                for outcome in batch:
+                    if isinstance(outcome, Exception):
+                        print(f"❌ Test crashed: {outcome!r}")
+                
+                # Let this burst's end-session calls finish before the next one starts
+                await _drain_pending()
+                
+                # Next run is on the fixed interval schedule, however long this batch took
+                delay = max(0.0, next_fire - time.monotonic())
+                next_run = time.time() + delay
+                
+                if next_run > end_epoch:
+                    print("\n✅ Test duration complete!")
+                    break
+                
+                print(f"\n⏰ Next test at: {_format_time(next_run)}")
+                print(f"   Waiting {delay / 60:.1f} minutes...")
+                
+                # Sleep until next test
+                await asyncio.sleep(delay)
             
-            # Sleep until next test
-            await asyncio.sleep(TEST_INTERVAL_MINUTES * 60)
+            await _drain_pending()
     
     except KeyboardInterrupt:
         print("\n\n⚠️  Testing interrupted by user")
     
+    finally:
+        csv_writer.close()
+    
     print(f"\n{'='*70}")
     print(f"Testing Complete!")
     print(f"Total Tests Run: {test_count}")
@@ -304,7 +466,13 @@ async def run_quick_test():
     print("\n🔬 Running Quick Test (Single Iteration)")
     print("="*70)
     
-    await run_single_test()
+    csv_writer = CSVResultWriter()
+    try:
+        async with create_session() as session:
+            await run_single_test(session, csv_writer)
+            await _drain_pending()
+    finally:
+        csv_writer.close()
     
     print("\n✅ Quick test complete!")
     print(f"Results saved to: {RESULTS_DIR}")
@@ -312,7 +480,7 @@ async def run_quick_test():
 
 
 if __name__ == "__main__":
-    import sys
+    QUIET = "--quiet" in sys.argv or "-q" in sys.argv
     
     if "--continuous" in sys.argv or "-c" in sys.argv:
         # Run continuous testing for 1 week
@@ -0,0 +1,18 @@
+"""
+Pytest fixtures for the backend endpoint tests.
+
+The app is started once per pytest run, so its startup hook (which loads the
+intent/NER models) runs a single time for every test that uses `client`.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient shared by all endpoint tests, with app startup/shutdown run once"""
+    # Imported here so collecting other test folders doesn't load the app and its models
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -1,14 +1,30 @@
 """
 Test suite for chatbot endpoints
 """
-from fastapi.testclient import TestClient
-from app.main import app
 import pytest
 
-client = TestClient(app)
+
+@pytest.fixture(scope="session")
+def intake_user(client):
+    """Submit intake once and share the user across the intent tests
+
+    None of the intents end the session (goodbye only replies), so the
+    greeting, find-trials and goodbye tests can run in any order.
+    """
+    user_id = "test_user_intents"
+    response = client.post("/intake", json={
+        "user_id": user_id,
+        "cancer_type": "lung cancer",
+        "stage": "stage 3",
+        "age": 55,
+        "sex": "male",
+        "location": "Texas"
+    })
+    assert response.status_code == 200
+    return user_id
 
 # Test Health Endpoint
-def test_health():
+def test_health(client):
     """Test the health check endpoint"""
     response = client.get("/health")
     assert response.status_code == 200
@@ -16,7 +32,7 @@ def test_health():
 
 
 # Test Intake Form Submission
-def test_intake_submission():
+def test_intake_submission(client):
     """Test submitting patient intake form"""
     intake_data = {
         "user_id": "test_user_123",
@@ -38,7 +54,7 @@ def test_intake_submission():
 
 
 # Test Message Without Intake (Should Fail)
-def test_message_without_intake():
+def test_message_without_intake(client):
     """Test sending message before completing intake form"""
     response = client.post("/message", json={
         "user_id": "new_user_456",
@@ -51,21 +67,10 @@ def test_message_without_intake():
 
 
 # Test Greeting Intent
-def test_greeting_intent():
+def test_greeting_intent(client, intake_user):
     """Test that bot recognizes greeting"""
-    # First submit intake
-    client.post("/intake", json={
-        "user_id": "test_user_greeting",
-        "cancer_type": "prostate cancer",
-        "stage": "stage 1",
-        "age": 60,
-        "sex": "male",
-        "location": "New York"
-    })
-    
-    # Then send greeting
     response = client.post("/message", json={
-        "user_id": "test_user_greeting",
+        "user_id": intake_user,
         "message": "Hello!"
     })
     assert response.status_code == 200
@@ -75,21 +80,10 @@ def test_greeting_intent():
 
 
 # Test Find Trials Intent
-def test_find_trials_intent():
+def test_find_trials_intent(client, intake_user):
     """Test finding clinical trials"""
-    # Submit intake first
-    client.post("/intake", json={
-        "user_id": "test_user_trials",
-        "cancer_type": "lung cancer",
-        "stage": "stage 3",
-        "age": 55,
-        "sex": "male",
-        "location": "Texas"
-    })
-    
-    # Request trials
     response = client.post("/message", json={
-        "user_id": "test_user_trials",
+        "user_id": intake_user,
         "message": "Can you find clinical trials for me?"
     })
     assert response.status_code == 200
@@ -103,21 +97,10 @@ def test_find_trials_intent():
 
 
 # Test Goodbye Intent
-def test_goodbye_intent():
+def test_goodbye_intent(client, intake_user):
     """Test that bot recognizes goodbye"""
-    # Submit intake first
-    client.post("/intake", json={
-        "user_id": "test_user_goodbye",
-        "cancer_type": "breast cancer",
-        "stage": "stage 2",
-        "age": 50,
-        "sex": "female",
-        "location": "Florida"
-    })
-    
-    # Say goodbye
     response = client.post("/message", json={
-        "user_id": "test_user_goodbye",
+        "user_id": intake_user,
         "message": "Thanks, goodbye!"
     })
     assert response.status_code == 200
@@ -127,7 +110,7 @@ def test_goodbye_intent():
 
 
 # Test End Session
-def test_end_session():
+def test_end_session(client):
     """Test ending a user session"""
     # Create a session first
     client.post("/intake", json={
@@ -150,7 +133,7 @@ def test_end_session():
 
 
 # Test Full Conversation Flow
-def test_full_conversation_flow():
+def test_full_conversation_flow(client):
     """Test a complete conversation from start to finish"""
     user_id = "test_user_full_flow"
     
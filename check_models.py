@@ -5,30 +5,33 @@ Script to check if your trained models exist and where they are
 import os
 from pathlib import Path
 
-def check_model_folder(folder_name):
+def check_model_folder(folder_name, cwd=None, home=None):
     """Check if a model folder exists and what's inside"""
+    cwd = cwd or Path.cwd()
+    home = home or Path.home()
+    folder_path = cwd / folder_name
     
     print(f"\n{'='*60}")
     print(f"Checking for: {folder_name}")
     print(f"{'='*60}")
     
     # Check current directory
-    if os.path.exists(folder_name):
-        print(f"✅ FOUND in current directory: {os.path.abspath(folder_name)}")
+    if folder_path.exists():
+        print(f"✅ FOUND in current directory: {folder_path}")
         print(f"\n📂 Contents:")
         
-        for item in os.listdir(folder_name):
-            item_path = os.path.join(folder_name, item)
-            size = os.path.getsize(item_path)
+        # One directory scan gives both names and sizes
+        with os.scandir(folder_path) as it:
+            entries = [(entry.name, entry.stat().st_size) for entry in it]
+        
+        for item, size in entries:
             size_mb = size / (1024 * 1024)
             print(f"  - {item} ({size_mb:.2f} MB)")
         
         # Check for required files
-        required_files = ['pytorch_model.bin', 'config.json', 'label_map.json']
-        missing = []
-        for req_file in required_files:
-            if not os.path.exists(os.path.join(folder_name, req_file)):
-                missing.append(req_file)
+        required_files = ['model.safetensors', 'config.json', 'label_map.json']
+        present = {name for name, _ in entries}
+        missing = [req_file for req_file in required_files if req_file not in present]
         
         if missing:
             print(f"\n⚠️  WARNING: Missing required files: {', '.join(missing)}")
@@ -42,9 +45,9 @@ def check_model_folder(folder_name):
         
         # Search in common locations
         search_paths = [
-            Path.home(),  # Home directory
-            Path.cwd().parent,  # Parent directory
-            Path.cwd() / "models",  # models subfolder
+            home,  # Home directory
+            cwd.parent,  # Parent directory
+            cwd / "models",  # models subfolder
         ]
         
         for search_path in search_paths:
@@ -65,11 +68,13 @@ def main():
     print("\n" + "="*60)
     print("ML MODEL LOCATION CHECKER")
     print("="*60)
-    print(f"Current directory: {os.getcwd()}")
+    cwd = Path.cwd()
+    home = Path.home()
+    print(f"Current directory: {cwd}")
     
     # Check both models
-    intent_found = check_model_folder("intent_model")
-    ner_found = check_model_folder("ner_model")
+    intent_found = check_model_folder("intent_model", cwd, home)
+    ner_found = check_model_folder("ner_model", cwd, home)
     
     print(f"\n{'='*60}")
     print("SUMMARY")